@@ -0,0 +1,33 @@
+import pytest
+from django.urls import reverse
+
+# google-redirect and google-login hand off to Google's OAuth servers and
+# are left out; every other GET route is authenticated.
+VOLUMES = [2, 8]
+
+ROUTES = [
+    ("me", 1),
+    ("profiles", 1),
+]
+
+
+@pytest.mark.parametrize("volume", VOLUMES)
+@pytest.mark.parametrize(
+    "name, budget", [pytest.param(name, budget, id=name) for name, budget in ROUTES]
+)
+def test_account_route_query_budget(
+    auth_client, seed, django_assert_max_num_queries, volume, name, budget
+):
+    seed(volume)
+
+    with django_assert_max_num_queries(budget):
+        response = auth_client.get(reverse(name))
+
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("name", [name for name, _ in ROUTES])
+def test_account_route_requires_authentication(api_client, db, name):
+    response = api_client.get(reverse(name))
+
+    assert response.status_code == 401
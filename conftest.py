@@ -0,0 +1,313 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from accounts.models import Profile
+from core.models import (
+    FAQ,
+    AreaOfActivity,
+    AreaOfDuty,
+    Banner,
+    CardRegister,
+    Cards,
+    Category,
+    Contact,
+    Container,
+    Core,
+    Email,
+    EmailWebsite,
+    Header,
+    News,
+    NewsAttachment,
+    NewsGalleryImage,
+    Page,
+    Popup,
+    Posters,
+    QuickAccessButtons,
+    Records,
+    ServiceButtons,
+    SocialMedia,
+    Subcategory,
+    Tag,
+    TypeOfService,
+    Unit,
+    UnitService,
+    WebsiteInformations,
+)
+
+PUBLISHED = {"status": "published"}
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def author(db):
+    user = User.objects.create_user(username="author", password="author")
+    Profile.objects.create(user=user, name="Author", email="author@example.com")
+    return user
+
+
+@pytest.fixture
+def auth_client(author):
+    client = APIClient()
+    client.force_authenticate(author)
+    return client
+
+
+@pytest.fixture
+def staff_client(author):
+    author.is_staff = True
+    author.save()
+    client = APIClient()
+    client.force_authenticate(author)
+    return client
+
+
+def create_news(author, index, tags):
+    highlight = "normal"
+    if index == 0:
+        highlight = "main"
+    elif index <= 3:
+        highlight = "secondary"
+
+    news = News.objects.create(
+        title=f"Notícia {index}",
+        text="Texto",
+        thumbnail="thumbnails/news.png",
+        author=author,
+        highlight=highlight,
+        path="/noticias",
+        **PUBLISHED,
+    )
+    news.tags.set(tags)
+    for position in range(2):
+        NewsGalleryImage.objects.create(news=news, image=f"news/gallery/{position}.png")
+        NewsAttachment.objects.create(
+            news=news, file=f"news/attachments/{position}.pdf"
+        )
+    return news
+
+
+def create_units(author, volume):
+    types = [
+        TypeOfService.objects.create(service_name=f"Serviço {index}", **PUBLISHED)
+        for index in range(2)
+    ]
+    areas = [
+        AreaOfDuty.objects.create(dutie_name=f"Área {index}", **PUBLISHED)
+        for index in range(2)
+    ]
+    cores = []
+    for core_index in range(volume):
+        core = Core.objects.create(core_name=f"Núcleo {core_index}", **PUBLISHED)
+        cores.append(core)
+        for unit_index in range(2):
+            unit = Unit.objects.create(
+                unit_name=f"Unidade {core_index}.{unit_index}",
+                core=core,
+                city="Florianópolis",
+                state="santa_catarina",
+                author=author,
+                **PUBLISHED,
+            )
+            unit.area_of_duty.set(areas)
+            for service_type in types:
+                UnitService.objects.create(
+                    unit=unit, type_of_service=service_type, schedules="8h às 18h"
+                )
+            Contact.objects.create(unit=unit, phone="4800000000", **PUBLISHED)
+            Email.objects.create(unit=unit, email=f"unidade{core_index}@example.com")
+    return cores
+
+
+def create_category_tree(author, volume):
+    categories = []
+    for category_index in range(volume):
+        category = Category.objects.create(
+            title=f"Categoria {category_index}", **PUBLISHED
+        )
+        categories.append(category)
+        parent = None
+        for depth in range(3):
+            parent = Subcategory.objects.create(
+                title=f"Subcategoria {category_index}.{depth}",
+                category=category,
+                sub_category=parent,
+                **PUBLISHED,
+            )
+            Records.objects.create(
+                title=f"Registro {category_index}.{depth}",
+                attachment="records/attachments/record.pdf",
+                sub_category=parent,
+                author=author,
+                **PUBLISHED,
+            )
+        Records.objects.create(
+            title=f"Registro {category_index}",
+            attachment="records/attachments/record.pdf",
+            category=category,
+            author=author,
+            **PUBLISHED,
+        )
+    return categories
+
+
+def create_cards(author, volume):
+    cards = []
+    for card_index in range(volume):
+        card = Cards.objects.create(title=f"Card {card_index}", **PUBLISHED)
+        cards.append(card)
+        for register_index in range(3):
+            CardRegister.objects.create(
+                card=card,
+                title=f"Registro de card {card_index}.{register_index}",
+                path="/cards",
+                author=author,
+                **PUBLISHED,
+            )
+    return cards
+
+
+def create_site_widgets(author, volume):
+    for index in range(volume):
+        Banner.objects.create(
+            banner="banner/images/banner.png",
+            alt=f"Banner {index}",
+            group="slides",
+            slot=index + 1,
+            author=author,
+            **PUBLISHED,
+        )
+        Container.objects.create(title=f"Container {index}", **PUBLISHED)
+        Popup.objects.create(title=f"Popup {index}", **PUBLISHED)
+        FAQ.objects.create(question=f"Pergunta {index}", author=author, **PUBLISHED)
+        AreaOfActivity.objects.create(title=f"Atuação {index}", **PUBLISHED)
+        Posters.objects.create(
+            title=f"Cartilha {index}",
+            path="/cartilhas",
+            image="posters/images/poster.png",
+            attachment="posters/attachments/poster.pdf",
+            **PUBLISHED,
+        )
+
+    for index in range(min(volume, 3)):
+        ServiceButtons.objects.create(
+            image="service/images/button.png",
+            title=f"Botão {index}",
+            author=author,
+            **PUBLISHED,
+        )
+    for group, _ in QuickAccessButtons.GROUP_CHOICES:
+        for index in range(min(volume, 6)):
+            QuickAccessButtons.objects.create(
+                title=f"Acesso {group} {index}",
+                image="quick_access/images/button.png",
+                group=group,
+                link="/",
+                author=author,
+                **PUBLISHED,
+            )
+    for network, _ in SocialMedia.NETWORK_CHOICES[:volume]:
+        SocialMedia.objects.create(
+            network=network, url=f"https://{network}.com", **PUBLISHED
+        )
+    for location, _ in EmailWebsite.LOCATION_CHOICES[:volume]:
+        EmailWebsite.objects.create(
+            location=location, email=f"{location}@example.com", **PUBLISHED
+        )
+    WebsiteInformations.objects.create(**PUBLISHED)
+
+
+@pytest.fixture
+def seed(author):
+    """
+    Returns a factory that fills the database with ``volume`` rows of every
+    public model, each with the related rows its serializers read.
+    """
+
+    def make(volume):
+        tags = [
+            Tag.objects.create(name_tag=f"tag-{index}", **PUBLISHED)
+            for index in range(3)
+        ]
+        news = [create_news(author, index, tags) for index in range(volume)]
+        cores = create_units(author, volume)
+        categories = create_category_tree(author, volume)
+        cards = create_cards(author, volume)
+        create_site_widgets(author, volume)
+
+        profiles = [
+            Profile.objects.create(
+                user=User.objects.create_user(username=f"user{index}"),
+                email=f"user{index}@example.com",
+            )
+            for index in range(volume)
+        ]
+        page = Page.objects.create(
+            title="Serviços",
+            path="/servicos",
+            has_faq=True,
+            has_news=True,
+            has_posters=True,
+            has_cores=True,
+            card=cards[0],
+            category=categories[0],
+            **PUBLISHED,
+        )
+        page.allowed_users.set(profiles)
+        for index in range(volume):
+            Page.objects.create(
+                title=f"Página {index}", path=f"/paginas/{index}", **PUBLISHED
+            ).allowed_users.set(profiles)
+        header = Header.objects.create(
+            structure=[
+                {
+                    "name": "Serviços",
+                    "page": {"id": page.pk},
+                    "children": [{"name": "Unidades", "children": []}],
+                }
+            ],
+            **PUBLISHED,
+        )
+        # One row of each model for the detail routes.
+        return {
+            "faq": FAQ.objects.first(),
+            "unit": Unit.objects.first(),
+            "core": cores[0],
+            "area_of_duty": AreaOfDuty.objects.first(),
+            "type_of_service": TypeOfService.objects.first(),
+            "popup": Popup.objects.first(),
+            "tag": tags[0],
+            "area_of_activity": AreaOfActivity.objects.first(),
+            "social_media": SocialMedia.objects.first(),
+            "email_website": EmailWebsite.objects.first(),
+            "news": news[0],
+            "gallery_image": NewsGalleryImage.objects.first(),
+            "attachment": NewsAttachment.objects.first(),
+            "card": cards[0],
+            "card_register": CardRegister.objects.first(),
+            "page": page,
+            "header": header,
+            "poster": Posters.objects.first(),
+            "category": categories[0],
+            "root": Subcategory.objects.filter(depth=0).first(),
+            "subcategory": Subcategory.objects.order_by("-depth").first(),
+            "record": Records.objects.first(),
+            "banner": Banner.objects.first(),
+            "container": Container.objects.first(),
+            "service_button": ServiceButtons.objects.first(),
+            "quick_access_button": QuickAccessButtons.objects.first(),
+        }
+
+    return make
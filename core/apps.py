@@ -6,4 +6,8 @@ class CoreConfig(AppConfig):
     name = "core"
 
     def ready(self):
-        return
+        from . import signals  # noqa: F401
+        from .middleware import get_sample_rate, instrument_serializers
+
+        if get_sample_rate():
+            instrument_serializers()
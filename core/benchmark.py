@@ -0,0 +1,231 @@
+import math
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from urllib import parse
+
+import django
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from core import urls as core_urls
+from core.middleware import RequestStats
+from core.models import CardRegister, Core, News, Page, Posters
+from core.seeding import SEEDED_MODELS
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Path parameters whose model cannot be read from the view's queryset.
+ROUTE_MODELS = {
+    "core-units": Core,
+    "page-bundle-detail": Page,
+    "news-detail": News,
+    "card_register-detail": CardRegister,
+    "posters-detail-slug": Posters,
+}
+
+# Routes that answer 400 without a query string.
+ROUTE_QUERIES = {
+    "page-route": lambda page: "?" + parse.urlencode({"path": page.path}),
+    "page-bundle": lambda page: "?" + parse.urlencode({"path": page.path}),
+}
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    index = max(math.ceil(fraction * len(values)) - 1, 0)
+    return values[index]
+
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def peak_allocated_kb(client, url, cold):
+    """
+    Peak memory Python allocated while serving ``url`` once. Traced on a
+    request of its own, as tracing slows down the timed ones.
+    """
+    if cold:
+        cache.clear()
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    start, _ = tracemalloc.get_traced_memory()
+    try:
+        client.get(url)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    return (peak - start) // 1024
+
+
+def get_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def sample_value(model, name):
+    queryset = model.objects.order_by("pk")
+    if any(field.name == "status" for field in model._meta.fields):
+        queryset = queryset.filter(status="published")
+    if name == "slug":
+        return queryset.exclude(slug="").values_list("slug", flat=True).first()
+    return queryset.values_list("pk", flat=True).first()
+
+
+def get_benchmark_routes():
+    """
+    One url per GET route in core/urls.py, with path parameters filled from
+    the first published row of the route's model. Routes that cannot be
+    filled, such as those whose table is empty, are returned with no url.
+    """
+    page = Page.objects.filter(path__isnull=False).order_by("pk").first()
+    routes = []
+    for pattern in core_urls.urlpatterns:
+        view_class = getattr(pattern.callback, "view_class", None)
+        if view_class is None or not hasattr(view_class, "get"):
+            continue
+
+        kwargs = {}
+        for name in pattern.pattern.converters:
+            if name == "model_name":
+                kwargs[name] = "news"
+                continue
+            model = ROUTE_MODELS.get(pattern.name)
+            if model is None and getattr(view_class, "queryset", None) is not None:
+                model = view_class.queryset.model
+            kwargs[name] = model and sample_value(model, name)
+
+        url = None
+        if None not in kwargs.values():
+            url = reverse(pattern.name, kwargs=kwargs)
+            if pattern.name in ROUTE_QUERIES:
+                url = page and url + ROUTE_QUERIES[pattern.name](page)
+        routes.append({"name": pattern.name, "route": str(pattern.pattern), "url": url})
+    return routes
+
+
+def benchmark_url(client, url, iterations, warmup, cold):
+    for _ in range(warmup):
+        client.get(url)
+
+    timings = []
+    queries = []
+    statuses = set()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        if cold:
+            cache.clear()
+        stats = RequestStats()
+        with connection.execute_wrapper(stats):
+            request_start = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - request_start) * 1000)
+        queries.append(stats.queries)
+        statuses.add(response.status_code)
+    elapsed = time.perf_counter() - start
+
+    timings.sort()
+    return {
+        "status": sorted(statuses),
+        "p50_ms": round(percentile(timings, 0.50), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "p99_ms": round(percentile(timings, 0.99), 3),
+        "mean_ms": round(sum(timings) / len(timings), 3),
+        "max_ms": round(timings[-1], 3),
+        "throughput_rps": round(iterations / elapsed, 2),
+        "queries_min": min(queries),
+        "queries_max": max(queries),
+        "peak_alloc_kb": peak_allocated_kb(client, url, cold),
+    }
+
+
+def run_benchmark(iterations=50, warmup=5, cold=False, only=None):
+    """
+    Requests every route in-process through the Django test client, so
+    nothing outside this process is involved beyond the configured database
+    and cache. With ``cold`` the cache is cleared before every request,
+    which measures the database path instead of the cached responses.
+    """
+    client = Client()
+    results = []
+    started = time.perf_counter()
+    for route in get_benchmark_routes():
+        if only and not any(name in route["route"] for name in only):
+            continue
+        result = dict(route)
+        if route["url"]:
+            result.update(benchmark_url(client, route["url"], iterations, warmup, cold))
+        results.append(result)
+    elapsed = time.perf_counter() - started
+
+    measured = [result for result in results if result["url"]]
+    return {
+        "created_at": timezone.now().isoformat(),
+        "revision": get_revision(),
+        "environment": {
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "platform": platform.platform(),
+            "database": connection.vendor,
+            "cache": type(cache).__name__,
+        },
+        "options": {"iterations": iterations, "warmup": warmup, "cold": cold},
+        "volumes": {
+            model._meta.label: model.objects.count() for model in SEEDED_MODELS
+        },
+        "routes": results,
+        "total": {
+            "requests": len(measured) * (iterations + warmup),
+            "seconds": round(elapsed, 3),
+            "peak_rss_kb": peak_rss_kb(),
+        },
+    }
+
+
+def compare_results(before, after):
+    """
+    Rows of (route, p50 before, p50 after, p95 change in percent, queries
+    before, queries after) for the routes measured in both runs.
+    """
+    previous = {result["route"]: result for result in before["routes"]}
+    rows = []
+    for result in after["routes"]:
+        old = previous.get(result["route"])
+        if not old or not old.get("url") or not result.get("url"):
+            continue
+        change = None
+        if old["p95_ms"]:
+            change = round((result["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100, 1)
+        rows.append(
+            (
+                result["route"],
+                old["p50_ms"],
+                result["p50_ms"],
+                change,
+                old["queries_max"],
+                result["queries_max"],
+            )
+        )
+    return rows
@@ -0,0 +1,169 @@
+import functools
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY = "model-version:{}"
+MODIFIED_KEY = "model-modified:{}"
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+
+def _version_key(model):
+    return VERSION_KEY.format(model._meta.label_lower)
+
+
+def get_models_version(models):
+    """
+    Returns a tuple identifying the current state of ``models``. It changes
+    whenever any row of one of them is written through a signal or through
+    one of the bulk helpers in core.services.
+    """
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return tuple(versions[key] for key in keys)
+
+
+def bump_model_version(*models):
+    def _bump():
+        for model in models:
+            key = _version_key(model)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, time.time_ns(), timeout=None)
+            # Deletes leave no updated_at behind, so remember when it happened.
+            cache.set(
+                MODIFIED_KEY.format(model._meta.label_lower), time.time(), timeout=None
+            )
+
+    transaction.on_commit(_bump)
+
+
+def _versioned_key(prefix, models):
+    version = ".".join(str(part) for part in get_models_version(models))
+    return f"{prefix}:{hashlib.md5(version.encode()).hexdigest()}"
+
+
+def cached_snapshot(name, models, builder, timeout=SNAPSHOT_TIMEOUT):
+    """
+    Returns the data built by ``builder``, cached under a key that embeds
+    the current version of ``models``. Writing to any of them moves the key,
+    so stale snapshots are simply never read again and expire on their own.
+    """
+    key = _versioned_key(f"snapshot:{name}", models)
+    data = cache.get(key)
+    if data is None:
+        data = builder()
+        cache.set(key, data, timeout)
+    return data
+
+
+def get_models_state(models):
+    """
+    Returns ``(last_modified, counts)`` for ``models``: the latest write as
+    a timestamp, or None when it cannot be told, and the row count of each
+    model. Computed with one aggregate per model, once per version.
+    """
+    labels = ",".join(model._meta.label_lower for model in models)
+    key = _versioned_key(
+        f"models-state:{hashlib.md5(labels.encode()).hexdigest()}", models
+    )
+    state = cache.get(key)
+    if state is not None:
+        return state
+
+    modified = cache.get_many(
+        [MODIFIED_KEY.format(model._meta.label_lower) for model in models]
+    )
+    timestamps = list(modified.values())
+    counts = []
+    for model in models:
+        if any(field.name == "updated_at" for field in model._meta.concrete_fields):
+            result = model.objects.aggregate(
+                last_modified=Max("updated_at"), count=Count("pk")
+            )
+            if result["last_modified"] is not None:
+                timestamps.append(result["last_modified"].timestamp())
+        else:
+            result = model.objects.aggregate(count=Count("pk"))
+            if MODIFIED_KEY.format(model._meta.label_lower) not in modified:
+                timestamps.append(None)
+        counts.append(result["count"])
+
+    last_modified = None
+    if timestamps and None not in timestamps:
+        last_modified = int(max(timestamps))
+    state = (last_modified, tuple(counts))
+    cache.set(key, state, SNAPSHOT_TIMEOUT)
+    return state
+
+
+def cache_response(*models, timeout=SNAPSHOT_TIMEOUT):
+    """
+    Caches the responses a view's ``get`` serves to anonymous users.
+
+    Entries are keyed by host, path and query string and tagged with the
+    versions of ``models``, so a write to any of those models invalidates
+    every endpoint that depends on it and nothing else. Responses also carry
+    ETag and Last-Modified validators derived from the same state, and
+    matching conditional requests are answered with 304 before the view
+    runs. Authenticated users may see unpublished content and always bypass
+    both.
+    """
+
+    def decorator(get):
+        @functools.wraps(get)
+        def wrapper(view, request, *args, **kwargs):
+            if request.user.is_authenticated:
+                return get(view, request, *args, **kwargs)
+
+            query = sorted(request.query_params.lists())
+            location = f"{request.build_absolute_uri(request.path)}?{query}"
+            versions = get_models_version(models)
+            last_modified, counts = get_models_state(models)
+            # The same data renders to JSON or MessagePack, and each is a
+            # separate representation for validators and shared caches.
+            media_type = getattr(request, "accepted_media_type", "")
+            etag = hashlib.md5(
+                f"{location}:{media_type}:{versions}:{last_modified}:{counts}".encode()
+            ).hexdigest()
+
+            not_modified = get_conditional_response(
+                request, etag=quote_etag(etag), last_modified=last_modified
+            )
+            if not_modified is not None:
+                return not_modified
+
+            key = _versioned_key(
+                f"response:{hashlib.md5(location.encode()).hexdigest()}", models
+            )
+            data = cache.get(key)
+            if data is not None:
+                response = Response(data)
+            else:
+                response = get(view, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                if hasattr(response, "data"):
+                    cache.set(key, response.data, timeout)
+
+            response["ETag"] = quote_etag(etag)
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+            patch_vary_headers(response, ["Accept"])
+            return response
+
+        return wrapper
+
+    return decorator
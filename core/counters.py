@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import defaultdict
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from core.models import Popup
+
+POPUP_COUNTER_FIELDS = ("click", "visualization")
+
+
+class RedisCounterBuffer:
+    """
+    Accumulates counter deltas in a Redis hash shared by every worker. The
+    hash is drained atomically by the flush_popup_counters task.
+    """
+
+    key = "popup-counters"
+
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url)
+
+    def add(self, pk, field, amount=1):
+        return self.client.hincrby(self.key, f"{pk}:{field}", amount)
+
+    def drain(self):
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hgetall(self.key)
+        pipe.delete(self.key)
+        values, _ = pipe.execute()
+        return {key.decode(): int(value) for key, value in values.items()}
+
+
+class LocalCounterBuffer:
+    """
+    In-process fallback used while debugging without a Redis URL. Celery cannot
+    see this memory, so the buffer flushes itself from the request that
+    finds it older than ``flush_interval`` seconds.
+    """
+
+    flush_interval = 60
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = defaultdict(int)
+        self.last_flush = time.monotonic()
+
+    def add(self, pk, field, amount=1):
+        with self.lock:
+            key = f"{pk}:{field}"
+            self.values[key] += amount
+            pending = self.values[key]
+            due = time.monotonic() - self.last_flush >= self.flush_interval
+
+        if due:
+            flush_popup_counters(self)
+        return pending
+
+    def drain(self):
+        with self.lock:
+            values, self.values = dict(self.values), defaultdict(int)
+            self.last_flush = time.monotonic()
+        return values
+
+
+_buffer = None
+
+
+def get_counter_buffer():
+    global _buffer
+
+    if _buffer is None:
+        url = getattr(settings, "COUNTER_BUFFER_URL", None)
+        _buffer = RedisCounterBuffer(url) if url else LocalCounterBuffer()
+    return _buffer
+
+
+def flush_popup_counters(buffer=None):
+    buffer = buffer or get_counter_buffer()
+    deltas = defaultdict(dict)
+    for key, amount in buffer.drain().items():
+        pk, field = key.split(":")
+        if field in POPUP_COUNTER_FIELDS and amount:
+            deltas[int(pk)][field] = amount
+
+    try:
+        with transaction.atomic():
+            for pk, fields in deltas.items():
+                Popup.objects.filter(pk=pk).update(
+                    **{field: F(field) + amount for field, amount in fields.items()}
+                )
+    except Exception:
+        for pk, fields in deltas.items():
+            for field, amount in fields.items():
+                buffer.add(pk, field, amount)
+        raise
+
+    # Counters are not part of the cached public responses, so the Popup
+    # version is left alone and the caches survive the flush.
+    return len(deltas)
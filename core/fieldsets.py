@@ -0,0 +1,136 @@
+from collections import namedtuple
+
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+class Fieldset(namedtuple("Fieldset", ["fields", "exclude", "expand"])):
+    """The names given in ``?fields=``, ``?exclude=`` and ``?expand=``."""
+
+    __slots__ = ()
+
+    def __str__(self):
+        # Safe to embed in cache keys.
+        return ";".join(",".join(names) for names in self)
+
+
+def parse_names(value):
+    return tuple(sorted({name.strip() for name in value.split(",") if name.strip()}))
+
+
+def get_fieldset(request):
+    """
+    The fieldset asked for in a read request's query string, or None when it
+    asks for none, in which case every field is rendered as before.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    params = request.query_params
+    fieldset = Fieldset(
+        *(parse_names(params.get(name, "")) for name in Fieldset._fields)
+    )
+    if not any(fieldset):
+        return None
+    return fieldset
+
+
+class SparseFieldsMixin:
+    """
+    For ModelSerializers: renders only the fields asked for with ``?fields=``
+    or all but those in ``?exclude=``. Once either of them or ``?expand=`` is
+    given, the fields in ``expandable_fields`` are left out unless named in
+    ``?expand=`` or ``?fields=``.
+
+    ``expandable_fields`` maps each nested field to the prefetch lookups only
+    it needs, which prune_queryset drops along with the field. Only the
+    serializer of the view handling the request is affected, not the ones
+    nested in it or built by other views.
+    """
+
+    expandable_fields = {}
+
+    def get_fieldset(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        view = self.context.get("view")
+        if parent is not None or not hasattr(view, "get_serializer_class"):
+            return None
+        if view.get_serializer_class() is not type(self):
+            return None
+        return get_fieldset(self.context.get("request"))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        self.omitted_sources = set()
+        fieldset = self.get_fieldset()
+        if fieldset is None:
+            return fields
+
+        for name, field in list(fields.items()):
+            if fieldset.fields:
+                keep = name in fieldset.fields or name in fieldset.expand
+            elif name in self.expandable_fields:
+                keep = name in fieldset.expand and name not in fieldset.exclude
+            else:
+                keep = name not in fieldset.exclude
+            if not keep:
+                del fields[name]
+                source = field.source or name
+                if source != "*":
+                    self.omitted_sources.add(source.split(".")[0])
+        return fields
+
+    def get_deferred_columns(self):
+        """
+        Columns read only by the fields left out. Nothing is deferred while a
+        method field is rendered, as it may read any of them.
+        """
+        readable = [field for field in self.fields.values() if not field.write_only]
+        if any(
+            isinstance(field, serializers.SerializerMethodField) or field.source == "*"
+            for field in readable
+        ):
+            return []
+
+        read = {field.source_attrs[0] for field in readable}
+        return [
+            model_field.name
+            for model_field in self.Meta.model._meta.concrete_fields
+            if model_field.name in self.omitted_sources
+            and model_field.name not in read
+            and not model_field.primary_key
+            and not model_field.is_relation
+        ]
+
+    def prune_queryset(self, queryset, keep=()):
+        """
+        Drops from ``queryset`` the prefetches of expandable fields that are
+        left out and defers the columns no rendered field reads, except those
+        in ``keep``, such as the ones a paginator orders by.
+        """
+        if self.get_fieldset() is None:
+            return queryset
+
+        fields = self.fields
+        needed = set()
+        dropped = set()
+        for name, lookups in self.expandable_fields.items():
+            (needed if name in fields else dropped).update(lookups)
+        dropped -= needed
+
+        lookups = queryset._prefetch_related_lookups
+        kept = [
+            lookup
+            for lookup in lookups
+            if (lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup)
+            not in dropped
+        ]
+        if len(kept) < len(lookups):
+            queryset = queryset.prefetch_related(None).prefetch_related(*kept)
+
+        deferred = [name for name in self.get_deferred_columns() if name not in keep]
+        if deferred:
+            queryset = queryset.defer(*deferred)
+        return queryset
@@ -0,0 +1,188 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def split_lookup(model, path):
+    """
+    Whether every relation along ``path`` holds a single row, so it can be
+    joined with select_related, and the model it ends on. Returns None for
+    paths that do not go through a relation.
+    """
+    single = True
+    is_relation = False
+    for name in path.split("__"):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if not field.is_relation:
+            break
+        is_relation = True
+        single = single and (field.many_to_one or field.one_to_one)
+        model = field.related_model
+    return (single, model) if is_relation else None
+
+
+def relation_path(model, source_attrs):
+    """The longest leading part of a source that goes through relations."""
+    path = []
+    for attr in source_attrs:
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            break
+        if not field.is_relation:
+            break
+        path.append(attr)
+        model = field.related_model
+    return "__".join(path)
+
+
+def join(prefix, path):
+    return f"{prefix}__{path}" if prefix else path
+
+
+class EagerLoadingPlan:
+    """
+    The select_related and prefetch_related lookups a serializer's rendered
+    fields need, found by walking them once:
+
+    * forward relations read through, such as ``source="category.title"``,
+      slug related fields and nested serializers, are joined;
+    * reverse and many-to-many relations, nested or not, are prefetched,
+      with a queryset planned the same way for what is nested in them;
+    * anything the fields cannot tell, like what a method field or an
+      overridden to_representation reads, comes from the serializer's
+      ``related_lookups``, which maps a field name to the lookups it needs.
+      Those can be Prefetch objects, e.g. to load only published rows.
+    """
+
+    def __init__(self, serializer):
+        self.select = []
+        self.prefetch = []
+        self.add_serializer(serializer, serializer.Meta.model, "")
+
+    def add_serializer(self, serializer, model, prefix):
+        hints = getattr(serializer, "related_lookups", {})
+        for field in serializer._readable_fields:
+            for lookup in hints.get(field.field_name, ()):
+                self.add_lookup(model, prefix, lookup)
+            if field.source != "*":
+                self.add_field(field, model, prefix)
+
+    def add_field(self, field, model, prefix):
+        if isinstance(field, serializers.SerializerMethodField):
+            return
+
+        if isinstance(field, serializers.ListSerializer):
+            path = "__".join(field.source_attrs)
+            if split_lookup(model, path):
+                self.add_prefetch(join(prefix, path), field.child)
+            return
+
+        if isinstance(field, serializers.ManyRelatedField):
+            path = "__".join(field.source_attrs)
+            if split_lookup(model, path):
+                self.add_lookup(model, prefix, path)
+            return
+
+        if isinstance(field, serializers.BaseSerializer):
+            path = "__".join(field.source_attrs)
+            resolved = split_lookup(model, path)
+            if resolved and resolved[0]:
+                self.select.append(join(prefix, path))
+                self.add_serializer(field, resolved[1], join(prefix, path))
+            return
+
+        self.add_source(field, model, prefix)
+
+    def add_source(self, field, model, prefix):
+        """Joins the relations a plain field's source reads through."""
+        path = relation_path(model, field.source_attrs)
+        if not path:
+            return
+        if isinstance(field, serializers.RelatedField) and path == "__".join(
+            field.source_attrs
+        ):
+            # Only the key is read when it is the whole source.
+            if field.use_pk_only_optimization():
+                return
+        self.add_lookup(model, prefix, path)
+
+    def add_prefetch(self, path, child):
+        """Prefetches ``path``, planning its queryset for ``child``."""
+        if not isinstance(child, serializers.ModelSerializer):
+            self.prefetch.append(path)
+            return
+        plan = EagerLoadingPlan(child)
+        if not plan.select and not plan.prefetch:
+            self.prefetch.append(path)
+            return
+        queryset = plan.apply(child.Meta.model._default_manager.all())
+        self.prefetch.append(Prefetch(path, queryset=queryset))
+
+    def add_lookup(self, model, prefix, lookup):
+        if isinstance(lookup, Prefetch):
+            # A copy, so the queryset of a shared hint is never evaluated.
+            queryset = lookup.queryset.all() if lookup.queryset is not None else None
+            self.prefetch.append(
+                Prefetch(
+                    join(prefix, lookup.prefetch_through), queryset, lookup.to_attr
+                )
+            )
+            return
+
+        resolved = split_lookup(model, lookup)
+        if resolved is None:
+            return
+        if resolved[0]:
+            self.select.append(join(prefix, lookup))
+        else:
+            self.prefetch.append(join(prefix, lookup))
+
+    def apply(self, queryset):
+        """
+        Adds the planned lookups to ``queryset``, skipping prefetches it
+        already has, such as the ones a view sets up by hand.
+        """
+        seen = {
+            lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup
+            for lookup in queryset._prefetch_related_lookups
+        }
+        prefetch = []
+        for lookup in self.prefetch:
+            path = lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup
+            if path not in seen:
+                seen.add(path)
+                prefetch.append(lookup)
+
+        if self.select:
+            queryset = queryset.select_related(*dict.fromkeys(self.select))
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+
+def plan_queryset(serializer, queryset):
+    """Eager loads on ``queryset`` the relations ``serializer`` renders."""
+    return EagerLoadingPlan(serializer).apply(queryset)
+
+
+class EagerLoadingMixin:
+    """
+    For GenericAPIView: read requests get a queryset that eager loads what
+    the view's serializer renders, so nested fields do not add a query per
+    row. Views building on get_queryset() need no select_related or
+    prefetch_related of their own.
+    """
+
+    def get_queryset(self):
+        return self.eager_load(super().get_queryset())
+
+    def eager_load(self, queryset):
+        request = getattr(self, "request", None)
+        if request is None or request.method not in SAFE_METHODS:
+            return queryset
+        return plan_queryset(self.get_serializer(), queryset)
@@ -0,0 +1,80 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.benchmark import compare_results, run_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Requests every route in core/urls.py in-process and reports latency "
+        "percentiles, throughput, query counts and peak memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="Clear the cache before every request.",
+        )
+        parser.add_argument(
+            "--only",
+            nargs="+",
+            help="Only routes containing any of these fragments.",
+        )
+        parser.add_argument("--output", help="Write the results to this JSON file.")
+        parser.add_argument(
+            "--compare", help="A previous results file to compare this run with."
+        )
+
+    def handle(self, *args, **options):
+        results = run_benchmark(
+            iterations=options["iterations"],
+            warmup=options["warmup"],
+            cold=options["cold"],
+            only=options["only"],
+        )
+
+        self.stdout.write(
+            f"{'route':<45} {'status':>8} {'p50':>9} {'p95':>9} {'p99':>9} "
+            f"{'req/s':>9} {'queries':>8} {'alloc KB':>9}"
+        )
+        for result in results["routes"]:
+            if not result["url"]:
+                self.stdout.write(f"{result['route']:<45} {'no data':>8}")
+                continue
+            status = ",".join(str(code) for code in result["status"])
+            self.stdout.write(
+                f"{result['route']:<45} {status:>8} {result['p50_ms']:>9.2f} "
+                f"{result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+                f"{result['throughput_rps']:>9.1f} {result['queries_max']:>8} "
+                f"{result['peak_alloc_kb']:>9}"
+            )
+        self.stdout.write(
+            f"{results['total']['requests']} requests in "
+            f"{results['total']['seconds']}s, peak RSS "
+            f"{results['total']['peak_rss_kb']} KB"
+        )
+
+        if options["compare"]:
+            with open(options["compare"]) as previous:
+                rows = compare_results(json.load(previous), results)
+            self.stdout.write(
+                f"\n{'route':<45} {'p50 before':>11} {'p50 after':>10} "
+                f"{'p95 change':>11} {'queries':>10}"
+            )
+            for route, before, after, change, old_queries, new_queries in rows:
+                change = "-" if change is None else f"{change:+.1f}%"
+                self.stdout.write(
+                    f"{route:<45} {before:>11.2f} {after:>10.2f} {change:>11} "
+                    f"{old_queries:>4} -> {new_queries:<4}"
+                )
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(
+                self.style.SUCCESS(f"Results written to {options['output']}")
+            )
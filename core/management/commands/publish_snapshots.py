@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core.snapshots import publish_snapshots
+
+
+class Command(BaseCommand):
+    help = "Renders the public API to static JSON files in the storage backend."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Render every snapshot, ignoring the previous manifest.",
+        )
+
+    def handle(self, *args, **options):
+        result = publish_snapshots(force=options["force"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{result['rendered']} snapshots rendered, {result['removed']} removed."
+            )
+        )
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from core.seeding import DEFAULT_VOLUMES, SyntheticDataSeeder
+
+
+class Command(BaseCommand):
+    help = "Fills the database with synthetic rows for load tests and benchmarks."
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_VOLUMES.items():
+            parser.add_argument(
+                f"--{name.replace('_', '-')}",
+                type=int,
+                default=default,
+                dest=name,
+                help=f"Defaults to {default}.",
+            )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Random seed, for reproducible data."
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete the rows of a previous run before seeding.",
+        )
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            deleted = SyntheticDataSeeder.clear()
+            self.stdout.write(f"{deleted} synthetic rows deleted.")
+
+        volumes = {name: options[name] for name in DEFAULT_VOLUMES}
+        counts = SyntheticDataSeeder(seed=options["seed"], **volumes).seed()
+        for label, count in counts.items():
+            self.stdout.write(f"{label}: {count}")
+        self.stdout.write(self.style.SUCCESS("Synthetic data seeded."))
@@ -0,0 +1,158 @@
+import contextvars
+import functools
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+_current_stats = contextvars.ContextVar("request_stats", default=None)
+
+
+def get_sample_rate():
+    return float(getattr(settings, "QUERY_INSTRUMENTATION_SAMPLE_RATE", 0) or 0)
+
+
+class RequestStats:
+    """
+    Collects what a single request spends in the database and in serializers.
+    Used as an ``execute_wrapper`` on every connection while it is active.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.in_serializer = False
+        self.statements = Counter()
+        self.executions = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.queries += 1
+            self.statements[sql] += 1
+            self.executions[(sql, repr(params))] += 1
+
+    @property
+    def duplicates(self):
+        """Queries run again with the very same SQL and parameters."""
+        return sum(count - 1 for count in self.executions.values())
+
+    @property
+    def max_repeats(self):
+        """Most runs of one SQL statement, whatever its parameters."""
+        return max(self.statements.values(), default=0)
+
+
+def _timed_data(data_property):
+    getter = data_property.fget
+
+    @functools.wraps(getter)
+    def data(self):
+        stats = _current_stats.get()
+        # Nested serializers run inside the outer one and are not counted
+        # twice.
+        if stats is None or stats.in_serializer:
+            return getter(self)
+
+        stats.in_serializer = True
+        start = time.perf_counter()
+        try:
+            return getter(self)
+        finally:
+            stats.serializer_time += time.perf_counter() - start
+            stats.in_serializer = False
+
+    return property(data)
+
+
+def instrument_serializers():
+    """
+    Times ``.data`` on every serializer while a sampled request is active.
+    Outside of one the wrapper costs a single context variable lookup.
+    """
+    for serializer_class in (serializers.Serializer, serializers.ListSerializer):
+        if not getattr(serializer_class.data.fget, "__wrapped__", None):
+            serializer_class.data = _timed_data(serializer_class.data)
+
+
+def count_rows(response):
+    data = getattr(response, "data", None)
+    if isinstance(data, dict):
+        data = data.get("results")
+    if isinstance(data, list):
+        return len(data)
+    return None
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Records query count, SQL time, duplicated queries and serializer time
+    for a sample of requests, set by QUERY_INSTRUMENTATION_SAMPLE_RATE. The
+    numbers go out in a Server-Timing header and in a log record. Requests
+    where one statement ran at least once per returned row are logged as
+    warnings, since that is how an N+1 in a serializer shows up.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample_rate = get_sample_rate()
+        if not sample_rate or random.random() >= sample_rate:
+            return self.get_response(request)
+
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        total_time = time.perf_counter() - start
+
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={stats.sql_time * 1000:.2f};desc="{stats.queries} queries, '
+                f'{stats.duplicates} duplicated"',
+                f"serializer;dur={stats.serializer_time * 1000:.2f}",
+                f"total;dur={total_time * 1000:.2f}",
+            ]
+        )
+
+        rows = count_rows(response)
+        grows_with_rows = bool(rows and rows > 1 and stats.max_repeats >= rows)
+        profile = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "view": getattr(request.resolver_match, "view_name", None),
+            "queries": stats.queries,
+            "sql_ms": round(stats.sql_time * 1000, 2),
+            "duplicates": stats.duplicates,
+            "max_repeats": stats.max_repeats,
+            "serializer_ms": round(stats.serializer_time * 1000, 2),
+            "total_ms": round(total_time * 1000, 2),
+            "rows": rows,
+            "grows_with_rows": grows_with_rows,
+        }
+        logger.log(
+            logging.WARNING if grows_with_rows else logging.INFO,
+            "%(method)s %(path)s: %(queries)s queries in %(sql_ms)sms",
+            profile,
+            extra={"sql_profile": profile},
+        )
+        return response
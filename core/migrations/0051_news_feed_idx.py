@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0050_alter_container_internal_link"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="news",
+            index=models.Index(
+                fields=["status", "-published_at", "-id"], name="news_feed_idx"
+            ),
+        ),
+    ]
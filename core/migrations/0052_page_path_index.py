@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0051_news_feed_idx"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="page",
+            name="path",
+            field=models.TextField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:45
+
+from django.db import migrations, models
+
+
+def populate_tree_path(apps, schema_editor):
+    Subcategory = apps.get_model("core", "Subcategory")
+    parents = dict(Subcategory.objects.values_list("id", "sub_category_id"))
+    paths = {}
+
+    def resolve(pk, seen=()):
+        if pk not in paths:
+            parent_id = parents.get(pk)
+            if parent_id is None or parent_id in seen or parent_id not in parents:
+                paths[pk] = f"/{pk}/"
+            else:
+                paths[pk] = f"{resolve(parent_id, seen + (pk,))}{pk}/"
+        return paths[pk]
+
+    subcategories = list(Subcategory.objects.only("id"))
+    for subcategory in subcategories:
+        subcategory.tree_path = resolve(subcategory.pk)
+        subcategory.depth = subcategory.tree_path.count("/") - 2
+    Subcategory.objects.bulk_update(
+        subcategories, ["tree_path", "depth"], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0052_page_path_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="subcategory",
+            name="depth",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="subcategory",
+            name="tree_path",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="subcategory",
+            index=models.Index(
+                fields=["tree_path"],
+                name="subcategory_tree_path_idx",
+                opclasses=["text_pattern_ops"],
+            ),
+        ),
+        migrations.RunPython(populate_tree_path, migrations.RunPython.noop),
+    ]
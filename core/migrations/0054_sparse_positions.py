@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:33
+
+from django.db import migrations, models
+
+POSITION_STEP = 1024
+
+
+def spread_positions(apps, schema_editor):
+    for model_name, group_field in [
+        ("Banner", "group"),
+        ("ServiceButtons", None),
+        ("QuickAccessButtons", "group"),
+    ]:
+        model = apps.get_model("core", model_name)
+        ordering = [group_field] if group_field else []
+        rows = list(model.objects.order_by(*ordering, "position", "id"))
+        index, group = 0, object()
+        for row in rows:
+            row_group = getattr(row, group_field) if group_field else None
+            if row_group != group:
+                index, group = 0, row_group
+            index += 1
+            row.position = index * POSITION_STEP
+        model.objects.bulk_update(rows, ["position"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0053_subcategory_tree_path"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="banner",
+            name="position",
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AlterField(
+            model_name="quickaccessbuttons",
+            name="position",
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AlterField(
+            model_name="servicebuttons",
+            name="position",
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(spread_positions, migrations.RunPython.noop),
+    ]
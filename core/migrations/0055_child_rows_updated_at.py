@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0054_sparse_positions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="email",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="newsattachment",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="newsgalleryimage",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="unitservice",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,7 +1,8 @@
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
-from django.db import models, transaction
-from django.db.models import F, Q
+from django.db import connection, models, transaction
+from django.db.models import Case, F, Max, Q, Value, When
+from django.db.models.functions import Concat, Substr
 from django.utils import timezone
 from django.utils.text import slugify
 
@@ -23,6 +24,10 @@ class BasePublishModel(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     published_at = models.DateTimeField(null=True, blank=True)
 
+    # Field holding the publication date of a "scheduled" row. The scheduler
+    # in dpe_core.tasks promotes the row once ``published_at`` is reached.
+    schedule_field = None
+
     class Meta:
         abstract = True
 
@@ -31,9 +36,129 @@ class BasePublishModel(models.Model):
             self.published_at = timezone.now()
         elif self.status == "not_published":
             self.published_at = None
+        elif self.status == "scheduled" and self.schedule_field:
+            self.published_at = getattr(self, self.schedule_field) or self.published_at
         super().save(*args, **kwargs)
 
 
+class PositionMixin:
+    """
+    Sparse ordering for models with a ``position`` field.
+
+    Rows are spread ``POSITION_STEP`` apart inside their group, so moving
+    one row only rewrites that row: it takes the midpoint between its new
+    neighbours. The group is renumbered, in a single UPDATE, only when two
+    neighbours have no gap left between them.
+
+    ``position`` is only a sort key. To move a row, set ``slot`` to the
+    1-based place it should land in among its group before saving; new rows
+    without one go first. Writes to a group wait for each other, so two
+    rows placed at once never read the same neighbours.
+    """
+
+    POSITION_STEP = 1024
+    position_group = None
+
+    @property
+    def slot(self):
+        return getattr(self, "_slot", None)
+
+    @slot.setter
+    def slot(self, value):
+        self._slot = value
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_position = instance.get_position_key()
+        return instance
+
+    def get_position_key(self):
+        group = getattr(self, self.position_group) if self.position_group else None
+        return self.__dict__.get("position"), group
+
+    @classmethod
+    def lock_position_group(cls, group=None):
+        """
+        Takes a lock on the group until the transaction ends. Row locks are
+        not enough: they miss the rows being inserted and empty groups.
+        """
+        if connection.vendor != "postgresql":
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_advisory_xact_lock(hashtext(%s))",
+                [f"{cls._meta.label_lower}:{group or ''}"],
+            )
+
+    def get_position_siblings(self):
+        siblings = type(self).objects.exclude(pk=self.pk)
+        if self.position_group:
+            siblings = siblings.filter(
+                **{self.position_group: getattr(self, self.position_group)}
+            )
+        return siblings
+
+    @classmethod
+    def apply_order(cls, ids):
+        """Spreads the rows in ``ids`` apart, in that order, with one UPDATE."""
+        if not ids:
+            return 0
+        return cls.objects.filter(pk__in=ids).update(
+            position=Case(
+                *[
+                    When(pk=pk, then=Value((index + 1) * cls.POSITION_STEP))
+                    for index, pk in enumerate(ids)
+                ],
+                output_field=models.PositiveIntegerField(),
+            )
+        )
+
+    def place_at(self, slot):
+        siblings = list(
+            self.get_position_siblings()
+            .order_by("position", "pk")
+            .values_list("pk", "position")
+        )
+        slot = max(1, min(slot or 1, len(siblings) + 1))
+        before = siblings[slot - 2][1] if slot > 1 else 0
+        if slot > len(siblings):
+            self.position = before + self.POSITION_STEP
+            return
+        after = siblings[slot - 1][1]
+        if after - before < 2:
+            ids = [pk for pk, _ in siblings]
+            type(self).apply_order(ids)
+            before = (slot - 1) * self.POSITION_STEP
+            after = slot * self.POSITION_STEP
+        self.position = (before + after) // 2
+
+    def joins_group(self):
+        """
+        Whether saving adds the row to its group: it is new or moved there.
+        The group limits checked in ``clean`` can only break then, so moves
+        inside the group skip ``full_clean``.
+        """
+        loaded = getattr(self, "_loaded_position", None)
+        return loaded is None or loaded[1] != self.get_position_key()[1]
+
+    def update_position(self):
+        loaded = getattr(self, "_loaded_position", None)
+        if loaded is None or self.slot is not None:
+            self.place_at(self.slot)
+        elif self.joins_group():
+            last = self.get_position_siblings().aggregate(last=Max("position"))
+            self.position = (last["last"] or 0) + self.POSITION_STEP
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            self.lock_position_group(self.get_position_key()[1])
+            self.update_position()
+            super().save(*args, **kwargs)
+        self._loaded_position = self.get_position_key()
+        self.slot = None
+
+
 class FAQ(BasePublishModel):
     question = models.TextField(blank=True, null=True)
     answer = models.TextField(blank=True, null=True)
@@ -171,6 +296,7 @@ class Unit(BasePublishModel):
 class Email(models.Model):
     unit = models.ForeignKey(Unit, on_delete=models.CASCADE, related_name="emails")
     email = models.EmailField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.email
@@ -192,6 +318,7 @@ class UnitService(models.Model):
         TypeOfService, on_delete=models.SET_NULL, null=True
     )
     schedules = models.TextField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.unit.unit_name} - {self.type_of_service.service_name}"
@@ -207,13 +334,15 @@ class Popup(BasePublishModel):
     click = models.PositiveIntegerField(default=0)
     visualization = models.PositiveIntegerField(default=0)
 
+    schedule_field = "start_date"
+
     def increment_click(self):
-        self.click += 1
-        self.save(update_fields=["click"])
+        Popup.objects.filter(pk=self.pk).update(click=F("click") + 1)
+        self.refresh_from_db(fields=["click"])
 
     def increment_visualization(self):
-        self.visualization += 1
-        self.save(update_fields=["visualization"])
+        Popup.objects.filter(pk=self.pk).update(visualization=F("visualization") + 1)
+        self.refresh_from_db(fields=["visualization"])
 
     def __str__(self):
         return self.title
@@ -310,6 +439,16 @@ class News(BasePublishModel):
     tags = models.ManyToManyField(Tag, blank=True)
     text = models.TextField()
 
+    schedule_field = "scheduled_at"
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "-published_at", "-id"],
+                name="news_feed_idx",
+            ),
+        ]
+
     def clean(self):
         super().clean()
         if self.highlight == "main":
@@ -327,8 +466,6 @@ class News(BasePublishModel):
     def save(self, *args, **kwargs):
         self.full_clean()
         self.slug = slugify(self.title)
-        if self.status == "scheduled" and self.published_at is None:
-            self.published_at = self.scheduled_at
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -339,6 +476,7 @@ class NewsGalleryImage(models.Model):
     news = models.ForeignKey(News, related_name="gallery", on_delete=models.CASCADE)
     image = models.ImageField(upload_to="news/gallery/")
     caption = models.CharField(max_length=255, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.caption
@@ -348,6 +486,7 @@ class NewsAttachment(models.Model):
     news = models.ForeignKey(News, related_name="attachments", on_delete=models.CASCADE)
     file = models.FileField(upload_to="news/attachments/")
     description = models.CharField(max_length=255, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.description
@@ -364,11 +503,12 @@ class Category(BasePublishModel):
     def __str__(self):
         return self.title
 
+    def records_queryset(self):
+        return Records.objects.filter(Q(category=self) | Q(sub_category__category=self))
+
     @property
     def records_count(self):
-        return Records.objects.filter(
-            Q(category=self) | Q(sub_category__category=self), status="published"
-        ).count()
+        return self.records_queryset().filter(status="published").count()
 
 
 class Subcategory(BasePublishModel):
@@ -379,10 +519,78 @@ class Subcategory(BasePublishModel):
     sub_category = models.ForeignKey(
         "self", null=True, blank=True, related_name="children", on_delete=models.CASCADE
     )
+    tree_path = models.TextField(blank=True, default="", editable=False)
+    depth = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["tree_path"],
+                name="subcategory_tree_path_idx",
+                opclasses=["text_pattern_ops"],
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    def is_descendant_of(self, other):
+        return self.pk == other.pk or f"/{other.pk}/" in self.tree_path
+
+    def get_ancestors(self):
+        ids = [int(pk) for pk in self.tree_path.strip("/").split("/")[:-1]]
+        return Subcategory.objects.filter(pk__in=ids).order_by("depth")
+
+    def get_descendants(self, include_self=False):
+        descendants = Subcategory.objects.filter(tree_path__startswith=self.tree_path)
+        if not include_self:
+            descendants = descendants.exclude(pk=self.pk)
+        return descendants
+
+    def clean(self):
+        super().clean()
+        if self.pk and self.sub_category_id:
+            parent = Subcategory.objects.get(pk=self.sub_category_id)
+            if parent.is_descendant_of(self):
+                raise ValidationError(
+                    {
+                        "sub_category": "Uma subcategoria não pode estar dentro "
+                        "dela mesma ou de uma de suas subcategorias."
+                    }
+                )
+
+    def save(self, *args, **kwargs):
+        self.clean()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.update_tree_path()
+
+    def update_tree_path(self):
+        parent_path = "/"
+        if self.sub_category_id:
+            parent_path = Subcategory.objects.values_list("tree_path", flat=True).get(
+                pk=self.sub_category_id
+            )
+        old_path, old_depth = Subcategory.objects.values_list(
+            "tree_path", "depth"
+        ).get(pk=self.pk)
+
+        tree_path = f"{parent_path}{self.pk}/"
+        depth = tree_path.count("/") - 2
+        if tree_path == old_path:
+            self.tree_path, self.depth = old_path, old_depth
+            return
+
+        Subcategory.objects.filter(pk=self.pk).update(tree_path=tree_path, depth=depth)
+        if old_path:
+            Subcategory.objects.filter(tree_path__startswith=old_path).exclude(
+                pk=self.pk
+            ).update(
+                tree_path=Concat(Value(tree_path), Substr("tree_path", len(old_path) + 1)),
+                depth=F("depth") + (depth - old_depth),
+            )
+        self.tree_path, self.depth = tree_path, depth
+
 
 class Records(BasePublishModel):
     title = models.CharField(max_length=255, unique=True)
@@ -431,7 +639,7 @@ class Posters(BasePublishModel):
         return self.title
 
 
-class Banner(BasePublishModel):
+class Banner(PositionMixin, BasePublishModel):
     GROUP_CHOICES = [
         ("slides", "Slides"),
         ("footer_banner", "Banner do rodapé"),
@@ -442,7 +650,9 @@ class Banner(BasePublishModel):
     slug = models.CharField(max_length=255, blank=True, null=True)
     alt = models.TextField(blank=True)
     group = models.CharField(max_length=255, choices=GROUP_CHOICES)
-    position = models.PositiveSmallIntegerField(default=1)
+    position = models.PositiveIntegerField(default=1)
+
+    position_group = "group"
 
     class Meta:
         ordering = ["position"]
@@ -454,14 +664,6 @@ class Banner(BasePublishModel):
             )
         ]
 
-    def delete(self, *args, **kwargs):
-        if self.group == "slides":
-            with transaction.atomic():
-                Banner.objects.filter(
-                    group="slides", position__gt=self.position
-                ).update(position=F("position") - 1)
-        super().delete(*args, **kwargs)
-
     def clean(self):
         super().clean()
         if self.group == "footer_banner":
@@ -474,31 +676,8 @@ class Banner(BasePublishModel):
                 raise ValidationError("Já existe um banner no rodapé.")
 
     def save(self, *args, **kwargs):
-        self.full_clean()
-        if self.group == "slides":
-            if not self.position or self.position < 1:
-                self.position = 1
-
-            with transaction.atomic():
-                if not self.pk:
-                    Banner.objects.filter(
-                        group="slides", position__gte=self.position
-                    ).update(position=F("position") + 1)
-                else:
-                    old_position = Banner.objects.get(pk=self.pk).position
-                    if old_position < self.position:
-                        Banner.objects.filter(
-                            group="slides",
-                            position__gt=old_position,
-                            position__lte=self.position,
-                        ).update(position=F("position") - 1)
-                    elif old_position > self.position:
-                        Banner.objects.filter(
-                            group="slides",
-                            position__gte=self.position,
-                            position__lt=old_position,
-                        ).update(position=F("position") + 1)
-
+        if self.joins_group():
+            self.full_clean()
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -530,12 +709,12 @@ class Container(BasePublishModel):
         return self.title
 
 
-class ServiceButtons(BasePublishModel):
+class ServiceButtons(PositionMixin, BasePublishModel):
     image = models.ImageField(upload_to="service/images/")
     title = models.CharField(max_length=255)
     title_color = models.CharField(max_length=255, blank=True, null=True)
     link = models.CharField(max_length=255, blank=True, null=True)
-    position = models.PositiveSmallIntegerField(default=1)
+    position = models.PositiveIntegerField(default=1)
 
     def clean(self):
         super().clean()
@@ -544,32 +723,15 @@ class ServiceButtons(BasePublishModel):
             raise ValidationError("Já existem 3 botões.")
 
     def save(self, *args, **kwargs):
-        self.full_clean()
-        if not self.position or self.position < 1:
-            self.position = 1
-
-        with transaction.atomic():
-            if not self.pk:
-                ServiceButtons.objects.filter(position__gte=self.position).update(
-                    position=F("position") + 1
-                )
-            else:
-                old_position = ServiceButtons.objects.get(pk=self.pk).position
-                if old_position < self.position:
-                    ServiceButtons.objects.filter(
-                        position__gt=old_position, position__lte=self.position
-                    ).update(position=F("position") - 1)
-                elif old_position > self.position:
-                    ServiceButtons.objects.filter(
-                        position__gte=self.position, position__lt=old_position
-                    ).update(position=F("position") + 1)
+        if self.joins_group():
+            self.full_clean()
         super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
 
 
-class QuickAccessButtons(BasePublishModel):
+class QuickAccessButtons(PositionMixin, BasePublishModel):
     GROUP_CHOICES = [
         ("above_group", "Parte superior"),
         ("under_group", "Parte inferior"),
@@ -580,9 +742,11 @@ class QuickAccessButtons(BasePublishModel):
     image = models.ImageField(upload_to="quick_access/images/")
     background_color = models.CharField(max_length=255, blank=True, null=True)
     group = models.CharField(max_length=255, choices=GROUP_CHOICES)
-    position = models.PositiveSmallIntegerField(default=1)
+    position = models.PositiveIntegerField(default=1)
     link = models.CharField(max_length=255)
 
+    position_group = "group"
+
     def clean(self):
         if (
             QuickAccessButtons.objects.exclude(pk=self.pk)
@@ -595,39 +759,8 @@ class QuickAccessButtons(BasePublishModel):
             )
 
     def save(self, *args, **kwargs):
-        self.full_clean()
-
-        if not self.position or self.position < 1:
-            self.position = 1
-
-        with transaction.atomic():
-            if not self.pk:
-                QuickAccessButtons.objects.filter(
-                    group=self.group, position__gte=self.position
-                ).update(position=F("position") + 1)
-            else:
-                old = QuickAccessButtons.objects.get(pk=self.pk)
-                if old.group != self.group:
-                    QuickAccessButtons.objects.filter(
-                        group=old.group, position__gt=old.position
-                    ).update(position=F("position") - 1)
-                    QuickAccessButtons.objects.filter(
-                        group=self.group, position__gte=self.position
-                    ).update(position=F("position") + 1)
-                elif old.position != self.position:
-                    if old.position < self.position:
-                        QuickAccessButtons.objects.filter(
-                            group=self.group,
-                            position__gt=old.position,
-                            position__lte=self.position,
-                        ).update(position=F("position") - 1)
-                    else:
-                        QuickAccessButtons.objects.filter(
-                            group=self.group,
-                            position__gte=self.position,
-                            position__lt=old.position,
-                        ).update(position=F("position") + 1)
-
+        if self.joins_group():
+            self.full_clean()
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -640,7 +773,7 @@ class Page(BasePublishModel):
         unique=True,
         error_messages={"unique": "Já existe uma página com este título."},
     )
-    path = models.TextField(blank=True, null=True)
+    path = models.TextField(blank=True, null=True, db_index=True)
     text = models.TextField(blank=True, null=True)
     has_faq = models.BooleanField(default=False)
     has_news = models.BooleanField(default=False)
@@ -0,0 +1,150 @@
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.core.exceptions import ValidationError
+from django.db.models import DateTimeField, Q
+from django.db.models.functions import Coalesce
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a composite key, e.g. ``(published_at, id)``.
+
+    The cursor stores the key of the last row served, so every page is read
+    with a ``WHERE (a, b) < (x, y)`` style filter instead of an OFFSET and
+    the cost of a page does not depend on how deep into the feed it is.
+    All ordering fields must share the same direction and the last one must
+    be unique. Keys that are not columns are computed by ``annotations``,
+    which maps their name to an expression with an output_field.
+    """
+
+    ordering = ("-published_at", "-id")
+    annotations = {}
+    page_size = 10
+    max_page_size = 50
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Cursor inválido."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        return self.get_page(queryset, self.decode_cursor(request))
+
+    def paginate_first_page(self, queryset, base_url):
+        """
+        Serves the first page of ``queryset`` from outside its own endpoint,
+        with the next link pointing at ``base_url``.
+        """
+        self.base_url = base_url
+        self.model = queryset.model
+        return self.get_page(queryset, None)
+
+    def get_page(self, queryset, position):
+        queryset = queryset.annotate(**self.annotations).order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self.build_position_filter(position))
+
+        rows = list(queryset[: self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size < 1:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_field_names(self):
+        return [field.lstrip("-") for field in self.ordering]
+
+    def get_key_field(self, name):
+        if name in self.annotations:
+            return self.annotations[name].output_field
+        return self.model._meta.get_field(name)
+
+    def build_position_filter(self, position):
+        lookup = "lt" if self.ordering[0].startswith("-") else "gt"
+        names = self.get_field_names()
+        condition = Q()
+        for index, name in enumerate(names):
+            step = Q(**{f"{name}__{lookup}": position[index]})
+            for previous in range(index):
+                step &= Q(**{names[previous]: position[previous]})
+            condition |= step
+        return condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            values = parse.parse_qs(b64decode(encoded.encode("ascii")).decode("ascii"))
+            position = []
+            for name in self.get_field_names():
+                field = self.get_key_field(name)
+                position.append(field.to_python(values[name][0]))
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def encode_cursor(self, instance):
+        values = {}
+        for name in self.get_field_names():
+            value = getattr(instance, name)
+            values[name] = value.isoformat() if hasattr(value, "isoformat") else value
+        encoded = b64encode(parse.urlencode(values).encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+
+class NewsFeedPagination(KeysetPagination):
+    ordering = ("-published_at", "-id")
+
+
+class PostersFeedPagination(KeysetPagination):
+    # Posters published before published_at was set on publish have none,
+    # so they are placed by when they were created.
+    annotations = {
+        "feed_date": Coalesce(
+            "published_at", "created_at", output_field=DateTimeField()
+        )
+    }
+    ordering = ("-feed_date", "-id")
+
+
+class OptionalPageNumberPagination(PageNumberPagination):
+    """
+    Page-number pagination that only kicks in when the client asks for a
+    page, so existing consumers of the unpaginated list keep working.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if (
+            self.page_query_param not in params
+            and self.page_size_query_param not in params
+        ):
+            return None
+        return super().paginate_queryset(queryset, request, view)
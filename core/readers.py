@@ -0,0 +1,248 @@
+import functools
+from collections import namedtuple
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import FileField
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.fields import empty
+from rest_framework.relations import PKOnlyObject, RelatedField
+from rest_framework.settings import api_settings
+
+# A serializer field read straight from ``values()``: the lookup holding its
+# value, the lookups of the relations it goes through and how it is turned
+# into its representation.
+Column = namedtuple("Column", ["name", "lookup", "null_lookups", "kind", "model_field"])
+
+
+def resolve_source(model, source_attrs):
+    """
+    The ``values()`` lookup for a source that follows forward relations to a
+    concrete column, the lookups of those relations and the column's model
+    field, or None for anything else (properties, reverse and many-to-many
+    relations).
+    """
+    lookups = []
+    null_lookups = []
+    field = None
+    for index, attr in enumerate(source_attrs):
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if not field.concrete or field.many_to_many:
+            return None
+        lookups.append(attr)
+        if index < len(source_attrs) - 1:
+            if not field.is_relation:
+                return None
+            null_lookups.append("__".join(lookups))
+            model = field.related_model
+    return "__".join(lookups), tuple(null_lookups), field
+
+
+def column_kind(field, model_field, null_lookups):
+    """
+    How a column's value is turned into its representation: as a related
+    key, as a file or as is. None when the field needs the model instance.
+    """
+    if isinstance(field, RelatedField):
+        if null_lookups or not model_field.is_relation:
+            return None
+        return "pk" if field.use_pk_only_optimization() else None
+    if type(field).get_attribute is not serializers.Field.get_attribute:
+        return None
+    if model_field.is_relation:
+        return None
+    if isinstance(model_field, FileField):
+        return "file"
+    return "value"
+
+
+def compile_column(model, field):
+    if isinstance(field, (serializers.BaseSerializer, serializers.ManyRelatedField)):
+        return None
+    if isinstance(field, serializers.SerializerMethodField) or field.source == "*":
+        return None
+
+    resolved = resolve_source(model, field.source_attrs)
+    if resolved is None:
+        return None
+    lookup, null_lookups, model_field = resolved
+
+    # Going through a null relation, DRF uses the default, None or leaves
+    # the key out; defaults are left to the serializer.
+    if null_lookups and (field.default is not empty or field.required):
+        return None
+
+    kind = column_kind(field, model_field, null_lookups)
+    if kind is None:
+        return None
+    return Column(field.field_name, lookup, null_lookups, kind, model_field)
+
+
+# Model fields whose values always come back from the database as one type,
+# and the DRF fields that represent a value of that type as itself.
+PYTHON_TYPES = {
+    "AutoField": int,
+    "BigAutoField": int,
+    "IntegerField": int,
+    "BigIntegerField": int,
+    "PositiveIntegerField": int,
+    "PositiveSmallIntegerField": int,
+    "SmallIntegerField": int,
+    "BooleanField": bool,
+    "CharField": str,
+    "TextField": str,
+    "SlugField": str,
+    "EmailField": str,
+    "URLField": str,
+}
+IDENTITY_METHODS = {
+    serializers.IntegerField.to_representation: int,
+    serializers.BooleanField.to_representation: bool,
+    serializers.CharField.to_representation: str,
+}
+
+
+def datetime_converter(field):
+    """
+    DateTimeField.to_representation for aware datetimes in ISO 8601, with
+    the field's timezone looked up once instead of once per value.
+    """
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+    field_timezone = (
+        field.timezone if hasattr(field, "timezone") else field.default_timezone()
+    )
+    if field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        if isinstance(value, str) or not timezone.is_aware(value):
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+
+    return convert
+
+
+class CompiledReader:
+    """
+    Read-only projection of a ModelSerializer over ``values()``.
+
+    Each row is a plain dict built without model instances or the per-field
+    attribute lookups of Serializer.to_representation. Values still go
+    through the serializer's own fields, bound with the request context, so
+    the output is the same as ``serializer.data``.
+    """
+
+    def __init__(self, serializer_class, columns):
+        self.serializer_class = serializer_class
+        self.columns = columns
+
+    @staticmethod
+    def converter(column, field):
+        """
+        The function turning a column value into its representation, or
+        None where the representation is the value itself.
+        """
+        to_representation = field.to_representation
+        method = type(field).to_representation
+        if column.kind == "pk":
+            return lambda value: to_representation(PKOnlyObject(pk=value))
+        if column.kind == "file":
+            model_field = column.model_field
+            return lambda value: to_representation(FieldFile(None, model_field, value))
+
+        python_type = PYTHON_TYPES.get(column.model_field.get_internal_type())
+        if python_type and IDENTITY_METHODS.get(method) is python_type:
+            return None
+        if method is serializers.ChoiceField.to_representation and python_type is str:
+            choices = field.choice_strings_to_values
+            if all(key == value for key, value in choices.items()):
+                return None
+        if method is serializers.DateTimeField.to_representation:
+            return datetime_converter(field)
+        return to_representation
+
+    def read(self, queryset, context=None):
+        # The bound fields are those left after ``?fields=`` and the like.
+        fields = self.serializer_class(context=context or {}).fields
+        columns = [column for column in self.columns if column.name in fields]
+        lookups = dict.fromkeys(
+            lookup
+            for column in columns
+            for lookup in (column.lookup, *column.null_lookups)
+        )
+        plan = [
+            (
+                column.name,
+                column.lookup,
+                column.null_lookups,
+                self.converter(column, fields[column.name]),
+                fields[column.name].allow_null,
+            )
+            for column in columns
+        ]
+
+        # Rows are dicts, so there is nothing to prefetch onto.
+        rows = []
+        for values in queryset.prefetch_related(None).values(*lookups):
+            row = {}
+            for name, lookup, null_lookups, convert, allow_null in plan:
+                if null_lookups and any(
+                    values[null_lookup] is None for null_lookup in null_lookups
+                ):
+                    if allow_null:
+                        row[name] = None
+                    continue
+                value = values[lookup]
+                if value is None or convert is None:
+                    row[name] = value
+                else:
+                    row[name] = convert(value)
+            rows.append(row)
+        return rows
+
+
+@functools.lru_cache(maxsize=None)
+def compile_reader(serializer_class):
+    """
+    Compiles a serializer's fields once, or returns None when any of them
+    needs the model instance, in which case the serializer is used as is.
+    """
+    if not issubclass(serializer_class, serializers.ModelSerializer):
+        return None
+    if (
+        serializer_class.to_representation
+        is not serializers.Serializer.to_representation
+    ):
+        return None
+
+    serializer = serializer_class()
+    model = serializer.Meta.model
+    columns = []
+    for field in serializer._readable_fields:
+        column = compile_column(model, field)
+        if column is None:
+            return None
+        columns.append(column)
+    return CompiledReader(serializer_class, columns)
+
+
+class CompiledReadMixin:
+    """
+    For GenericAPIView: serializes read-only lists through the compiled
+    reader of the view's serializer when it has one.
+    """
+
+    def get_list_data(self, queryset):
+        reader = compile_reader(self.get_serializer_class())
+        if reader is None:
+            return self.get_serializer(queryset, many=True).data
+        return reader.read(queryset, self.get_serializer_context())
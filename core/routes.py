@@ -0,0 +1,86 @@
+import threading
+from collections import namedtuple
+
+from core.caching import get_models_version
+from core.models import Header, Page
+from core.services import get_node_path
+
+Route = namedtuple("Route", ["path", "page_id", "ancestors"])
+
+
+def normalize_path(path):
+    return "/" + path.strip().strip("/")
+
+
+class RouteTable:
+    """
+    In-memory map from a frontend path to its page id and the chain of
+    ancestor routes, built from Page.path and the Header structure.
+    """
+
+    def __init__(self, routes=None):
+        self.routes = routes or {}
+
+    @classmethod
+    def build(cls):
+        routes = {}
+        for path, page_id in Page.objects.filter(path__isnull=False).values_list(
+            "path", "id"
+        ):
+            routes[normalize_path(path)] = Route(normalize_path(path), page_id, ())
+
+        header = Header.objects.only("structure").first()
+        if header and isinstance(header.structure, list):
+            cls._walk(header.structure, routes)
+        return cls(routes)
+
+    @classmethod
+    def _walk(cls, nodes, routes, parent_path="", ancestors=()):
+        for node in nodes:
+            if not isinstance(node, dict):
+                continue
+            current_path = get_node_path(node.get("name", ""), parent_path)
+            if not current_path:
+                continue
+
+            path = normalize_path(current_path)
+            page_info = node.get("page")
+            page_id = page_info.get("id") if isinstance(page_info, dict) else None
+            if path in routes and page_id is None:
+                page_id = routes[path].page_id
+
+            route = Route(path, page_id, ancestors)
+            routes[path] = route
+            cls._walk(
+                node.get("children") or [],
+                routes,
+                current_path,
+                ancestors + (Route(path, page_id, ()),),
+            )
+
+    def resolve(self, path):
+        return self.routes.get(normalize_path(path))
+
+
+_lock = threading.Lock()
+_table = None
+_table_version = None
+
+
+def get_route_table():
+    """
+    Returns the process-wide route table, rebuilding it when a Header or
+    Page was written since it was built, in this or any other worker. The
+    versions are read from the shared cache set up by CACHE_URL.
+    """
+    global _table, _table_version
+
+    version = get_models_version([Header, Page])
+    if _table is not None and _table_version == version:
+        return _table
+
+    with _lock:
+        if _table is None or _table_version != version:
+            _table = RouteTable.build()
+            _table_version = version
+    return _table
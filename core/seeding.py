@@ -0,0 +1,559 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from core.caching import bump_model_version
+from core.models import (
+    FAQ,
+    AreaOfActivity,
+    AreaOfDuty,
+    Banner,
+    CardRegister,
+    Cards,
+    Category,
+    Contact,
+    Container,
+    Core,
+    Email,
+    EmailWebsite,
+    Header,
+    News,
+    NewsAttachment,
+    NewsGalleryImage,
+    Page,
+    Popup,
+    Posters,
+    QuickAccessButtons,
+    Records,
+    ServiceButtons,
+    SocialMedia,
+    Subcategory,
+    Tag,
+    TypeOfService,
+    Unit,
+    UnitService,
+    WebsiteInformations,
+)
+from core.services import get_node_path, reconcile_tag_usage
+
+SEEDER_USERNAME = "synthetic-seeder"
+BATCH_SIZE = 1000
+
+DEFAULT_VOLUMES = {
+    "news": 20000,
+    "tags": 200,
+    "cores": 100,
+    "units": 2000,
+    "categories": 10,
+    "depth": 5,
+    "breadth": 3,
+    "cards": 50,
+    "registers": 20,
+    "posters": 500,
+    "faqs": 200,
+    "menu_items": 12,
+}
+
+# Every model whose rows the seeder writes, parents before children.
+SEEDED_MODELS = [
+    Tag,
+    News,
+    NewsGalleryImage,
+    NewsAttachment,
+    TypeOfService,
+    AreaOfDuty,
+    Core,
+    Unit,
+    UnitService,
+    Contact,
+    Email,
+    Category,
+    Subcategory,
+    Records,
+    Cards,
+    CardRegister,
+    Posters,
+    FAQ,
+    Popup,
+    AreaOfActivity,
+    WebsiteInformations,
+    SocialMedia,
+    EmailWebsite,
+    Banner,
+    ServiceButtons,
+    QuickAccessButtons,
+    Page,
+    Container,
+    Header,
+]
+
+
+class SyntheticDataSeeder:
+    """
+    Fills the database with synthetic rows at a configurable volume.
+
+    Rows are written with bulk_create, which skips save() and the model
+    signals, so whatever those would have derived (slugs, tree paths, tag
+    usage, page paths and cache versions) is set here. The same seed always
+    yields the same data. Every row is authored by a dedicated user, which
+    is how ``clear`` finds them again.
+    """
+
+    def __init__(self, seed=0, **volumes):
+        self.random = random.Random(seed)
+        self.volumes = {**DEFAULT_VOLUMES, **volumes}
+        self.now = timezone.now()
+        self.author = None
+
+    def status(self):
+        return "published" if self.random.random() < 0.9 else "not_published"
+
+    def published_at(self, status):
+        if status != "published":
+            return None
+        return self.now - timedelta(minutes=self.random.randrange(3 * 365 * 24 * 60))
+
+    def publish_fields(self):
+        status = self.status()
+        return {
+            "status": status,
+            "published_at": self.published_at(status),
+            "author": self.author,
+        }
+
+    def bulk_create(self, model, objs):
+        return model.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+
+    def seed_news(self):
+        tags = self.bulk_create(
+            Tag,
+            [
+                Tag(name_tag=f"tag-sintetica-{index}", **self.publish_fields())
+                for index in range(self.volumes["tags"])
+            ],
+        )
+        # The home page shows one main and three secondary highlights.
+        highlights = []
+        if not News.objects.filter(highlight="main").exists():
+            highlights.append("main")
+        free = 3 - News.objects.filter(highlight="secondary").count()
+        highlights.extend(["secondary"] * free)
+
+        news = []
+        for index in range(self.volumes["news"]):
+            title = f"Notícia sintética {index}"
+            news.append(
+                News(
+                    title=title,
+                    slug=slugify(title),
+                    highlight=highlights[index]
+                    if index < len(highlights)
+                    else "normal",
+                    path=f"/noticias/{slugify(title)}",
+                    subtitle="Subtítulo da notícia",
+                    thumbnail="thumbnails/synthetic.png",
+                    text="Texto da notícia. " * 50,
+                    **self.publish_fields(),
+                )
+            )
+        news = self.bulk_create(News, news)
+
+        through = News.tags.through
+        self.bulk_create(
+            through,
+            [
+                through(news_id=item.pk, tag_id=tag.pk)
+                for item in news
+                for tag in self.random.sample(tags, min(3, len(tags)))
+            ],
+        )
+        self.bulk_create(
+            NewsGalleryImage,
+            [
+                NewsGalleryImage(
+                    news=item, image=f"news/gallery/synthetic-{position}.png"
+                )
+                for item in news
+                for position in range(2)
+            ],
+        )
+        self.bulk_create(
+            NewsAttachment,
+            [
+                NewsAttachment(news=item, file="news/attachments/synthetic.pdf")
+                for item in news
+            ],
+        )
+
+    def seed_units(self):
+        types = self.bulk_create(
+            TypeOfService,
+            [
+                TypeOfService(service_name=f"Serviço {index}", **self.publish_fields())
+                for index in range(10)
+            ],
+        )
+        areas = self.bulk_create(
+            AreaOfDuty,
+            [
+                AreaOfDuty(dutie_name=f"Área {index}", **self.publish_fields())
+                for index in range(10)
+            ],
+        )
+        cores = self.bulk_create(
+            Core,
+            [
+                Core(core_name=f"Núcleo sintético {index}", **self.publish_fields())
+                for index in range(self.volumes["cores"])
+            ],
+        )
+        units = self.bulk_create(
+            Unit,
+            [
+                Unit(
+                    unit_name=f"Unidade sintética {index}",
+                    core=cores[index % len(cores)],
+                    city="Florianópolis",
+                    state="santa_catarina",
+                    street="Rua Sintética",
+                    is_principal=index < len(cores),
+                    **self.publish_fields(),
+                )
+                for index in range(self.volumes["units"])
+            ],
+        )
+
+        through = Unit.area_of_duty.through
+        self.bulk_create(
+            through,
+            [
+                through(unit_id=unit.pk, areaofduty_id=area.pk)
+                for unit in units
+                for area in self.random.sample(areas, 2)
+            ],
+        )
+        self.bulk_create(
+            UnitService,
+            [
+                UnitService(unit=unit, type_of_service=service, schedules="8h às 18h")
+                for unit in units
+                for service in self.random.sample(types, 2)
+            ],
+        )
+        self.bulk_create(
+            Contact,
+            [
+                Contact(unit=unit, phone=f"48{index:08d}", **self.publish_fields())
+                for index, unit in enumerate(units)
+                for _ in range(2)
+            ],
+        )
+        self.bulk_create(
+            Email,
+            [
+                Email(unit=unit, email=f"unidade{index}@example.com")
+                for index, unit in enumerate(units)
+            ],
+        )
+
+    def seed_categories(self):
+        categories = self.bulk_create(
+            Category,
+            [
+                Category(title=f"Categoria sintética {index}", **self.publish_fields())
+                for index in range(self.volumes["categories"])
+            ],
+        )
+        records = []
+        level = [(category, None) for category in categories]
+        for _ in range(self.volumes["depth"]):
+            nodes = self.bulk_create(
+                Subcategory,
+                [
+                    Subcategory(
+                        title=f"Subcategoria {category.pk}.{position}",
+                        category=category,
+                        sub_category=parent,
+                        **self.publish_fields(),
+                    )
+                    for category, parent in level
+                    for position in range(self.volumes["breadth"])
+                ],
+            )
+            for node in nodes:
+                parent_path = node.sub_category.tree_path if node.sub_category else "/"
+                node.tree_path = f"{parent_path}{node.pk}/"
+                node.depth = node.tree_path.count("/") - 2
+            Subcategory.objects.bulk_update(
+                nodes, ["tree_path", "depth"], batch_size=BATCH_SIZE
+            )
+            records.extend(
+                Records(
+                    title=f"Registro sintético {node.pk}",
+                    slug=slugify(f"Registro sintético {node.pk}"),
+                    attachment="records/attachments/synthetic.pdf",
+                    sub_category=node,
+                    **self.publish_fields(),
+                )
+                for node in nodes
+            )
+            level = [(node.category, node) for node in nodes]
+        self.bulk_create(Records, records)
+        return categories
+
+    def seed_cards(self):
+        cards = self.bulk_create(
+            Cards,
+            [
+                Cards(title=f"Card sintético {index}", **self.publish_fields())
+                for index in range(self.volumes["cards"])
+            ],
+        )
+        registers = []
+        for card in cards:
+            for position in range(self.volumes["registers"]):
+                title = f"Registro {card.pk}-{position}"
+                registers.append(
+                    CardRegister(
+                        card=card,
+                        title=title,
+                        slug=slugify(title),
+                        path="/cards",
+                        text="Texto do registro.",
+                        **self.publish_fields(),
+                    )
+                )
+        self.bulk_create(CardRegister, registers)
+        return cards
+
+    def seed_content(self):
+        posters = []
+        for index in range(self.volumes["posters"]):
+            title = f"Cartilha sintética {index}"
+            posters.append(
+                Posters(
+                    title=title,
+                    slug=slugify(title),
+                    path=f"/cartilhas/{slugify(title)}",
+                    image="posters/images/synthetic.png",
+                    attachment="posters/attachments/synthetic.pdf",
+                    **self.publish_fields(),
+                )
+            )
+        self.bulk_create(Posters, posters)
+        self.bulk_create(
+            FAQ,
+            [
+                FAQ(
+                    question=f"Pergunta sintética {index}",
+                    answer="Resposta.",
+                    **self.publish_fields(),
+                )
+                for index in range(self.volumes["faqs"])
+            ],
+        )
+        self.bulk_create(
+            Banner,
+            [
+                Banner(
+                    banner="banner/images/synthetic.png",
+                    alt=f"Banner sintético {index}",
+                    group="slides",
+                    position=(index + 1) * Banner.POSITION_STEP,
+                    author=self.author,
+                    status="published",
+                )
+                for index in range(8)
+            ],
+        )
+        self.bulk_create(
+            Popup,
+            [
+                Popup(title=f"Popup sintético {index}", **self.publish_fields())
+                for index in range(5)
+            ],
+        )
+        self.bulk_create(
+            AreaOfActivity,
+            [
+                AreaOfActivity(
+                    title=f"Atuação sintética {index}", **self.publish_fields()
+                )
+                for index in range(12)
+            ],
+        )
+        self.bulk_create(
+            Container,
+            [
+                Container(
+                    title=f"Container sintético {index}",
+                    type="external",
+                    external_link="https://example.com",
+                    **self.publish_fields(),
+                )
+                for index in range(6)
+            ],
+        )
+        # These are capped by their clean() or unique per choice, so they are
+        # only topped up.
+        if not WebsiteInformations.objects.exists():
+            WebsiteInformations.objects.create(
+                title="Site sintético", author=self.author, status="published"
+            )
+        networks = set(SocialMedia.objects.values_list("network", flat=True))
+        self.bulk_create(
+            SocialMedia,
+            [
+                SocialMedia(
+                    network=network,
+                    url=f"https://{network}.com",
+                    author=self.author,
+                    status="published",
+                )
+                for network, _ in SocialMedia.NETWORK_CHOICES
+                if network not in networks
+            ],
+        )
+        locations = set(EmailWebsite.objects.values_list("location", flat=True))
+        self.bulk_create(
+            EmailWebsite,
+            [
+                EmailWebsite(
+                    location=location,
+                    email=f"{location}@example.com",
+                    author=self.author,
+                    status="published",
+                )
+                for location, _ in EmailWebsite.LOCATION_CHOICES
+                if location not in locations
+            ],
+        )
+        self.bulk_create(
+            ServiceButtons,
+            [
+                ServiceButtons(
+                    image="service/images/synthetic.png",
+                    title=f"Botão sintético {index}",
+                    position=(index + 1) * ServiceButtons.POSITION_STEP,
+                    author=self.author,
+                    status="published",
+                )
+                for index in range(3 - ServiceButtons.objects.count())
+            ],
+        )
+        self.bulk_create(
+            QuickAccessButtons,
+            [
+                QuickAccessButtons(
+                    title=f"Acesso sintético {group} {index}",
+                    image="quick_access/images/synthetic.png",
+                    group=group,
+                    link="/",
+                    position=(index + 1) * QuickAccessButtons.POSITION_STEP,
+                    author=self.author,
+                    status="published",
+                )
+                for group, _ in QuickAccessButtons.GROUP_CHOICES
+                for index in range(
+                    6 - QuickAccessButtons.objects.filter(group=group).count()
+                )
+            ],
+        )
+
+    def seed_pages_and_header(self, categories, cards):
+        """
+        A three-level menu where the first two levels point at pages, with
+        paths derived from the menu the way a Header save derives them. Only
+        the seeded pages are given paths, and the menu is only saved when
+        the site has none yet, so real pages and menus are left alone.
+        """
+        structure = []
+        pages = []
+        for index in range(self.volumes["menu_items"]):
+            children = []
+            for child_index in range(8):
+                children.append(
+                    {
+                        "name": f"Seção {index}.{child_index}",
+                        "page": None,
+                        "children": [
+                            {"name": f"Item {index}.{child_index}.{leaf}"}
+                            for leaf in range(5)
+                        ],
+                    }
+                )
+            structure.append(
+                {"name": f"Menu sintético {index}", "page": None, "children": children}
+            )
+
+        for index, node in enumerate(structure):
+            node_path = get_node_path(node["name"])
+            for child_index, child in enumerate([node] + node["children"]):
+                path = node_path
+                if child is not node:
+                    path = get_node_path(child["name"], node_path)
+                child["page"] = {"path": path}
+                pages.append(
+                    Page(
+                        title=f"{child['name']} página",
+                        path=path,
+                        text="Conteúdo da página.",
+                        has_faq=child_index == 0,
+                        has_news=child_index == 1,
+                        has_posters=child_index == 2,
+                        has_cores=child_index == 3,
+                        card=cards[index % len(cards)] if cards else None,
+                        category=(
+                            categories[index % len(categories)] if categories else None
+                        ),
+                        status="published",
+                        published_at=self.now,
+                        author=self.author,
+                    )
+                )
+        pages = iter(self.bulk_create(Page, pages))
+        for node in structure:
+            for child in [node] + node["children"]:
+                child["page"]["id"] = next(pages).pk
+
+        if not Header.objects.exists():
+            Header.objects.create(
+                structure=structure, author=self.author, status="published"
+            )
+
+    def seed(self):
+        with transaction.atomic():
+            self.author, _ = User.objects.get_or_create(username=SEEDER_USERNAME)
+            self.seed_news()
+            self.seed_units()
+            categories = self.seed_categories()
+            cards = self.seed_cards()
+            self.seed_content()
+            self.seed_pages_and_header(categories, cards)
+        reconcile_tag_usage()
+        bump_model_version(*SEEDED_MODELS)
+        return {model._meta.label: model.objects.count() for model in SEEDED_MODELS}
+
+    @staticmethod
+    def clear():
+        """Deletes every row a previous run wrote, children through CASCADE."""
+        author = User.objects.filter(username=SEEDER_USERNAME).first()
+        if author is None:
+            return 0
+
+        deleted = 0
+        with transaction.atomic():
+            for model in reversed(SEEDED_MODELS):
+                if any(field.name == "author" for field in model._meta.fields):
+                    deleted += model.objects.filter(author=author).delete()[0]
+            author.delete()
+        bump_model_version(*SEEDED_MODELS)
+        return deleted
+
+
+def seed_synthetic_data(seed=0, **volumes):
+    return SyntheticDataSeeder(seed=seed, **volumes).seed()
@@ -1,10 +1,13 @@
 from django.core.exceptions import ValidationError as DjangoValidationError
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Prefetch
 from django.utils.text import slugify
 from rest_framework import serializers
 
 from accounts.models import Profile
 from accounts.serializers import ProfileSerializer
+from core.counters import POPUP_COUNTER_FIELDS
+from core.fieldsets import SparseFieldsMixin
 from core.models import (
     FAQ,
     AreaOfActivity,
@@ -36,9 +39,10 @@ from core.models import (
     UnitService,
     WebsiteInformations,
 )
+from core.services import sync_related_rows, with_unit_relations
 
 
-class FAQSerializer(serializers.ModelSerializer):
+class FAQSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author_name = serializers.CharField(source="author.username", read_only=True)
 
     class Meta:
@@ -47,34 +51,34 @@ class FAQSerializer(serializers.ModelSerializer):
         read_only_fields = ["author", "created_at", "updated_at", "published_at"]
 
 
-class CoreSerializer(serializers.ModelSerializer):
+class CoreSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Core
         fields = "__all__"
         read_only_fields = ["author", "created_at", "updated_at", "published_at"]
 
 
-class TypeOfServiceSerializer(serializers.ModelSerializer):
+class TypeOfServiceSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = TypeOfService
         fields = "__all__"
         read_only_fields = ["author", "created_at", "updated_at", "published_at"]
 
 
-class AreaOfDutySerializer(serializers.ModelSerializer):
+class AreaOfDutySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = AreaOfDuty
         fields = "__all__"
         read_only_fields = ["author", "created_at", "updated_at", "published_at"]
 
 
-class UnitServiceSerializer(serializers.ModelSerializer):
+class UnitServiceSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = UnitService
         fields = ["type_of_service", "schedules"]
 
 
-class ContactSerializer(serializers.ModelSerializer):
+class ContactSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     phone = serializers.CharField(required=False, allow_blank=True, allow_null=True)
     department = serializers.CharField(required=False, allow_blank=True, allow_null=True)
     is_whatsapp = serializers.BooleanField(required=False, default=False)
@@ -83,7 +87,7 @@ class ContactSerializer(serializers.ModelSerializer):
         model = Contact
         fields = ["phone", "is_whatsapp", "department"]
 
-class EmailSerializer(serializers.ModelSerializer):
+class EmailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     email = serializers.EmailField(required=False, allow_blank=True, allow_null=True)
     
     class Meta:
@@ -91,7 +95,7 @@ class EmailSerializer(serializers.ModelSerializer):
         fields = ["email", "id"]
 
 
-class UnitSerializer(serializers.ModelSerializer):
+class UnitSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     services = UnitServiceSerializer(many=True, required=False)
     area_of_duty = serializers.SlugRelatedField(
         many=True, queryset=AreaOfDuty.objects.all(), slug_field="dutie_name"
@@ -105,62 +109,75 @@ class UnitSerializer(serializers.ModelSerializer):
         fields = "__all__"
         read_only_fields = ["author", "created_at", "updated_at", "published_at"]
 
+    expandable_fields = {
+        "services": ["services"],
+        "area_of_duty": ["area_of_duty"],
+        "contacts": ["contacts"],
+        "emails": ["emails"],
+    }
+
+    nested_fields = {
+        "services": ["type_of_service", "schedules"],
+        "contacts": ["phone", "is_whatsapp", "department"],
+        "emails": ["email"],
+    }
+
+    def pop_nested(self, validated_data):
+        """
+        Pops the nested lists out of ``validated_data``. On partial updates a
+        list that was not sent is left out, so its rows stay as they are.
+        """
+        nested = {}
+        for name in ["area_of_duty", *self.nested_fields]:
+            if name in validated_data:
+                nested[name] = validated_data.pop(name)
+            elif not self.partial:
+                nested[name] = []
+        return nested
+
+    def save_nested(self, unit, nested):
+        if "area_of_duty" in nested:
+            unit.area_of_duty.set(nested["area_of_duty"])
+
+        if "contacts" in nested:
+            nested["contacts"] = [
+                contact
+                for contact in nested["contacts"]
+                if contact.get("phone") and contact["phone"].strip()
+            ]
+        if "emails" in nested:
+            nested["emails"] = [
+                email
+                for email in nested["emails"]
+                if email.get("email") and email["email"].strip()
+            ]
+
+        for name, fields in self.nested_fields.items():
+            if name in nested:
+                sync_related_rows(getattr(unit, name), nested[name], fields)
+
     def create(self, validated_data):
-        services_data = validated_data.pop("services", [])
-        area_data = validated_data.pop("area_of_duty", [])
-        contacts_data = validated_data.pop("contacts", [])
-        emails_data = validated_data.pop("emails", [])
-        
-        unit = Unit.objects.create(**validated_data)
-        unit.area_of_duty.set(area_data)
-        
-        for service_data in services_data:
-            UnitService.objects.create(unit=unit, **service_data)
-        
-        for contact_data in contacts_data:
-            phone = contact_data.get("phone")
-            if phone and phone.strip():
-                Contact.objects.create(unit=unit, **contact_data)
-        
-        for email_data in emails_data:
-            email = email_data.get("email")
-            if email and email.strip():
-                Email.objects.create(unit=unit, **email_data)
-        
+        nested = self.pop_nested(validated_data)
+
+        with transaction.atomic():
+            unit = Unit.objects.create(**validated_data)
+            self.save_nested(unit, nested)
+
         return unit
 
     def update(self, instance, validated_data):
-        services_data = validated_data.pop("services", [])
-        area_data = validated_data.pop("area_of_duty", [])
-        contacts_data = validated_data.pop("contacts", [])
-        emails_data = validated_data.pop("emails", [])
-        
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        
-        instance.area_of_duty.set(area_data)
-        
-        instance.services.all().delete()
-        for service_data in services_data:
-            UnitService.objects.create(unit=instance, **service_data)
-        
-        instance.contacts.all().delete()
-        for contact_data in contacts_data:
-            phone = contact_data.get("phone")
-            if phone and phone.strip():
-                Contact.objects.create(unit=instance, **contact_data)
-        
-        instance.emails.all().delete()
-        for email_data in emails_data:
-            email = email_data.get("email")
-            if email and email.strip():
-                Email.objects.create(unit=instance, **email_data)
-        
+        nested = self.pop_nested(validated_data)
+
+        with transaction.atomic():
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+            self.save_nested(instance, nested)
+
         return instance
 
 
-class PopupSerializer(serializers.ModelSerializer):
+class PopupSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Popup
         fields = "__all__"
@@ -173,8 +190,18 @@ class PopupSerializer(serializers.ModelSerializer):
             "published_at",
         ]
 
+    def get_fields(self):
+        fields = super().get_fields()
+        # The counters change with every view, so they stay out of the
+        # cached public responses and are only shown to signed-in users.
+        request = self.context.get("request")
+        if request is None or not request.user.is_authenticated:
+            for name in POPUP_COUNTER_FIELDS:
+                fields.pop(name, None)
+        return fields
+
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = "__all__"
@@ -187,47 +214,47 @@ class TagSerializer(serializers.ModelSerializer):
         ]
 
 
-class AreaOfActivitySerializer(serializers.ModelSerializer):
+class AreaOfActivitySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = AreaOfActivity
         fields = "__all__"
         read_only_fields = ["author", "created_at", "updated_at", "published_at"]
 
 
-class WebsiteInformationsSerializer(serializers.ModelSerializer):
+class WebsiteInformationsSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = WebsiteInformations
         fields = "__all__"
         read_only_fields = ["author", "created_at", "updated_at", "published_at"]
 
 
-class SocialMediaSerializer(serializers.ModelSerializer):
+class SocialMediaSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = SocialMedia
         fields = "__all__"
         read_only_fields = ["author", "created_at", "updated_at", "published_at"]
 
 
-class EmailWebsiteSerializer(serializers.ModelSerializer):
+class EmailWebsiteSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = EmailWebsite
         fields = "__all__"
         read_only_fields = ["author", "created_at", "updated_at", "published_at"]
 
 
-class NewsGalleryImageSerializer(serializers.ModelSerializer):
+class NewsGalleryImageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = NewsGalleryImage
         fields = ("id", "image", "caption")
 
 
-class NewsAttachmentSerializer(serializers.ModelSerializer):
+class NewsAttachmentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = NewsAttachment
         fields = ("id", "file", "description")
 
 
-class NewsSerializer(serializers.ModelSerializer):
+class NewsSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     gallery = NewsGalleryImageSerializer(many=True, required=False, read_only=True)
     attachments = NewsAttachmentSerializer(many=True, required=False, read_only=True)
     clear_tags = serializers.BooleanField(write_only=True, required=False)
@@ -250,14 +277,16 @@ class NewsSerializer(serializers.ModelSerializer):
             }
         }
 
+    expandable_fields = {
+        "gallery": ["gallery"],
+        "attachments": ["attachments"],
+        "tags": ["tags"],
+    }
+
     def to_representation(self, instance):
         data = super().to_representation(instance)
-
-        if instance.tags.exists():
+        if "tags" in data:
             data["tags"] = TagSerializer(instance.tags.all(), many=True).data
-        else:
-            data["tags"] = []
-
         return data
 
     def create(self, validated_data):
@@ -361,7 +390,7 @@ class NewsSerializer(serializers.ModelSerializer):
         return instance
 
 
-class RecordsSerializer(serializers.ModelSerializer):
+class RecordsSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Records
         fields = "__all__"
@@ -385,7 +414,7 @@ class RecordsSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class SubcategorySerializer(serializers.ModelSerializer):
+class SubcategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     category_title = serializers.CharField(source="category.title", read_only=True)
     sub_category_title = serializers.CharField(
         source="sub_category.title",
@@ -399,8 +428,27 @@ class SubcategorySerializer(serializers.ModelSerializer):
         fields = "__all__"
         read_only_fields = ["author", "created_at", "updated_at", "published_at"]
 
+    expandable_fields = {"records": ["records"]}
 
-class CategorySerializer(serializers.ModelSerializer):
+    def validate(self, attrs):
+        parent = attrs.get("sub_category")
+        if self.instance and parent and parent.is_descendant_of(self.instance):
+            raise serializers.ValidationError(
+                {
+                    "sub_category": "Uma subcategoria não pode estar dentro "
+                    "dela mesma ou de uma de suas subcategorias."
+                }
+            )
+        return attrs
+
+
+class SubcategoryNodeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Subcategory
+        fields = ["id", "title", "status", "category", "sub_category", "depth"]
+
+
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     records_count = serializers.SerializerMethodField()
     subcategories = SubcategorySerializer(many=True, read_only=True)
     slug = Category.pk
@@ -411,34 +459,34 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = "__all__"
         read_only_fields = ["author", "created_at", "updated_at", "published_at"]
 
+    expandable_fields = {"subcategories": ["subcategories"], "records": []}
+
     def get_records_count(self, obj):
-        return Records.objects.filter(
-            Q(category=obj) | Q(sub_category__category=obj)
-        ).count()
+        if hasattr(obj, "total_records"):
+            return obj.total_records
+        return obj.records_queryset().count()
 
     def get_records(self, obj):
-        direct_records = Records.objects.filter(category=obj, status="published")
-        sub_records = Records.objects.filter(
-            sub_category__category=obj, status="published"
-        )
-        all_records = direct_records | sub_records
-        return RecordsSerializer(all_records, many=True).data
+        records = getattr(obj, "published_records", None)
+        if records is None:
+            records = obj.records_queryset().filter(status="published")
+        return RecordsSerializer(records, many=True).data
 
 
-class PostersSerializer(serializers.ModelSerializer):
+class PostersSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Posters
         fields = "__all__"
         read_only_fields = ["author", "created_at", "updated_at", "published_at"]
 
 
-class CardRegisterMiniSerializer(serializers.ModelSerializer):
+class CardRegisterMiniSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = CardRegister
         fields = ["id", "title", "slug", "subtitle"]
 
 
-class CardsSerializer(serializers.ModelSerializer):
+class CardsSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     registers = CardRegisterMiniSerializer(many=True, read_only=True)
 
     class Meta:
@@ -446,8 +494,10 @@ class CardsSerializer(serializers.ModelSerializer):
         fields = "__all__"
         read_only_fields = ["author", "created_at", "updated_at", "published_at"]
 
+    expandable_fields = {"registers": ["registers"]}
+
 
-class CardRegisterSerializer(serializers.ModelSerializer):
+class CardRegisterSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     remove_image = serializers.BooleanField(write_only=True, required=False)
     card = serializers.PrimaryKeyRelatedField(
         queryset=Cards.objects.all(), write_only=True
@@ -464,12 +514,32 @@ class CardRegisterSerializer(serializers.ModelSerializer):
             }
         }
 
+    expandable_fields = {
+        "card_detail": ["card__registers"],
+        "related_cards": ["card__latest_registers"],
+    }
+
+    related_lookups = {
+        "related_cards": [
+            "card",
+            Prefetch(
+                "card__registers",
+                queryset=CardRegister.objects.order_by("-id"),
+                to_attr="latest_registers",
+            ),
+        ]
+    }
+
     def get_related_cards(self, obj):
-        queryset = (
-            CardRegister.objects.filter(card=obj.card)
-            .exclude(id=obj.id)
-            .order_by("-id")[:3]
-        )
+        registers = getattr(obj.card, "latest_registers", None)
+        if registers is not None:
+            queryset = [register for register in registers if register.id != obj.id][:3]
+        else:
+            queryset = (
+                CardRegister.objects.filter(card=obj.card)
+                .exclude(id=obj.id)
+                .order_by("-id")[:3]
+            )
         return CardRegisterMiniSerializer(
             queryset, many=True, context=self.context
         ).data
@@ -503,15 +573,39 @@ class CardRegisterSerializer(serializers.ModelSerializer):
         return instance
 
 
-class BannerSerializer(serializers.ModelSerializer):
+class PositionSlotMixin:
+    """
+    For the serializers of PositionMixin models. ``position`` is read-only,
+    as rows are moved through ``slot``; sending it is an error rather than
+    silently ignored.
+    """
+
+    def validate(self, attrs):
+        if "position" in self.initial_data:
+            raise serializers.ValidationError(
+                {"position": "position é somente leitura, use slot para mover o item."}
+            )
+        return super().validate(attrs)
+
+
+class BannerSerializer(
+    PositionSlotMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
+    slot = serializers.IntegerField(write_only=True, required=False, min_value=1)
+
     class Meta:
         model = Banner
         fields = "__all__"
-        read_only_fields = ["author", "created_at", "updated_at", "published_at"]
+        read_only_fields = [
+            "author",
+            "position",
+            "created_at",
+            "updated_at",
+            "published_at",
+        ]
 
     def save_instance(self, instance):
         try:
-            instance.full_clean()
             instance.save()
             return instance
         except DjangoValidationError as e:
@@ -527,7 +621,7 @@ class BannerSerializer(serializers.ModelSerializer):
         return self.save_instance(instance)
 
 
-class ContainerSerializer(serializers.ModelSerializer):
+class ContainerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     internal_link = serializers.PrimaryKeyRelatedField(
         queryset=Page.objects.all(),
         allow_null=True,
@@ -539,8 +633,12 @@ class ContainerSerializer(serializers.ModelSerializer):
         fields = "__all__"
         read_only_fields = ["author", "created_at", "updated_at", "published_at"]
 
+    related_lookups = {"internal_link": ["internal_link"]}
+
     def to_representation(self, instance):
         data = super().to_representation(instance)
+        if "internal_link" not in data:
+            return data
         if instance.internal_link:
             data["internal_link"] = {
                 "id": instance.internal_link.id,
@@ -551,21 +649,41 @@ class ContainerSerializer(serializers.ModelSerializer):
         return data
 
 
-class ServiceButtonsSerializer(serializers.ModelSerializer):
+class ServiceButtonsSerializer(
+    PositionSlotMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
+    slot = serializers.IntegerField(write_only=True, required=False, min_value=1)
+
     class Meta:
         model = ServiceButtons
         fields = "__all__"
-        read_only_fields = ["author", "created_at", "updated_at", "published_at"]
+        read_only_fields = [
+            "author",
+            "position",
+            "created_at",
+            "updated_at",
+            "published_at",
+        ]
+
 
+class QuickAccessButtonsSerializer(
+    PositionSlotMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
+    slot = serializers.IntegerField(write_only=True, required=False, min_value=1)
 
-class QuickAccessButtonsSerializer(serializers.ModelSerializer):
     class Meta:
         model = QuickAccessButtons
         fields = "__all__"
-        read_only_fields = ["author", "created_at", "updated_at", "published_at"]
+        read_only_fields = [
+            "author",
+            "position",
+            "created_at",
+            "updated_at",
+            "published_at",
+        ]
 
 
-class PageSerializer(serializers.ModelSerializer):
+class PageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     allowed_users = ProfileSerializer(many=True, read_only=True)
 
     allowed_users_ids = serializers.PrimaryKeyRelatedField(
@@ -580,8 +698,10 @@ class PageSerializer(serializers.ModelSerializer):
         model = Page
         fields = "__all__"
 
+    expandable_fields = {"allowed_users": ["allowed_users"]}
+
 
-class CoresAndUnitSerializer(serializers.ModelSerializer):
+class CoresAndUnitSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     units = serializers.SerializerMethodField()
 
     class Meta:
@@ -589,12 +709,26 @@ class CoresAndUnitSerializer(serializers.ModelSerializer):
         fields = "__all__"
         read_only_fields = ["author", "created_at", "updated_at", "published_at"]
 
+    expandable_fields = {"units": ["published_units"]}
+
+    related_lookups = {
+        "units": [
+            Prefetch(
+                "units",
+                queryset=with_unit_relations(Unit.objects.filter(status="published")),
+                to_attr="published_units",
+            )
+        ]
+    }
+
     def get_units(self, obj):
-        published_units = obj.units.filter(status="published")
+        published_units = getattr(obj, "published_units", None)
+        if published_units is None:
+            published_units = obj.units.filter(status="published")
         return UnitSerializer(published_units, many=True).data
 
 
-class HeaderSerializer(serializers.ModelSerializer):
+class HeaderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Header
         fields = ["id", "background_color", "name_color", "structure"]
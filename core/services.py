@@ -1,14 +1,45 @@
+from collections import defaultdict
 from copy import deepcopy
-from django.utils.text import slugify
+
+from django.apps import apps
 from django.db import transaction
-from core.models import Page, News, Posters, CardRegister
+from django.db.models import (
+    Count,
+    Exists,
+    F,
+    Func,
+    OuterRef,
+    Q,
+    Subquery,
+    TextField,
+    Value,
+)
+from django.db.models.functions import Coalesce, Concat
+from django.utils import timezone
+from django.utils.text import slugify
+
+from core.caching import bump_model_version
+from core.models import (
+    BasePublishModel,
+    CardRegister,
+    Core,
+    News,
+    Page,
+    Popup,
+    Posters,
+    Records,
+    Tag,
+    Unit,
+)
 
 
 def update_path_on_page_deletion(page):
     if page.has_posters:
         Posters.objects.all().update(path=None)
+        bump_model_version(Posters)
     if page.has_news:
         News.objects.all().update(path=None)
+        bump_model_version(News)
     if page.card:
         page.card.path = None
         page.card.status = "not_published"
@@ -30,61 +61,335 @@ def clean_page_data(request):
     return data
 
 
+def update_slug_paths(model, path):
+    new_path = Concat(Value(f"{path}/"), F("slug"), output_field=TextField())
+    changed = model.objects.exclude(path=new_path)
+    updated = changed.update(path=new_path, updated_at=timezone.now())
+    if updated:
+        bump_model_version(model)
+    return updated
+
+
 def update_news_path(path):
-    news_list = News.objects.all()
-    for news in news_list:
-        news.path = f'{path}/{news.slug}'
-        news.save()
+    return update_slug_paths(News, path)
 
 
 def update_posters_path(path):
-    posters_list = Posters.objects.all()
-    for poster in posters_list:
-        poster.path = f'{path}/{poster.slug}'
-        poster.save()
+    return update_slug_paths(Posters, path)
+
+
+def get_node_path(name, parent_slug_path=""):
+    slug = slugify(name)
+    if parent_slug_path:
+        current_path = f"{parent_slug_path.rstrip('/')}/{slug}"
+    else:
+        current_path = f"/{slug}" if slug else ""
+
+    if current_path and not current_path.startswith("/"):
+        current_path = "/" + current_path.lstrip("/")
+    return current_path
+
+
+def collect_page_nodes(nodes, parent_slug_path="", page_nodes=None):
+    """
+    The ``(node, page id, path)`` of every menu node pointing at a page,
+    with the path derived from the names of the node and its parents.
+    """
+    if page_nodes is None:
+        page_nodes = []
+    for node in nodes:
+        current_path = get_node_path(node.get("name", ""), parent_slug_path)
+
+        page_info = node.get("page")
+        if isinstance(page_info, dict) and page_info.get("id"):
+            page_nodes.append((node, str(page_info["id"]), current_path))
+        elif isinstance(page_info, dict):
+            page_info["path"] = page_info.get("path")
+
+        children = node.get("children") or []
+        if children:
+            collect_page_nodes(children, current_path, page_nodes)
+    return page_nodes
 
 
 def update_pages_path(structure):
     data_copy = deepcopy(structure)
-    id_list = []
-
-    def _walk(nodes, parent_slug_path=""):
-        for node in nodes:
-            name = node.get("name", "")
-            slug = slugify(name)
-            if parent_slug_path:
-                current_path = f"{parent_slug_path.rstrip('/')}/{slug}"
-            else:
-                current_path = f"/{slug}" if slug else ""
-
-            if current_path and not current_path.startswith("/"):
-                current_path = "/" + current_path.lstrip("/")
-
-            page_info = node.get("page")
-            if isinstance(page_info, dict) and page_info.get("id"):
-                page_id = page_info["id"]
-                try:
-                    with transaction.atomic():
-                        page_obj = Page.objects.select_for_update().get(id=page_id)
-                        if page_obj.has_news:
-                            update_news_path(current_path)
-                        if page_obj.has_posters:
-                            update_posters_path(current_path)
-                        id_list.append(page_id)
-                        page_obj.path = current_path
-                        page_obj.status = "published"
-                        page_obj.save(update_fields=["path", "status"])
-                        node.setdefault("page", {})["path"] = current_path
-                except Page.DoesNotExist:
-                    node["page"] = None
-            else:
-                if isinstance(page_info, dict):
-                    node.setdefault("page", {})["path"] = page_info.get("path")
-
-            children = node.get("children") or []
-            if children:
-                _walk(children, current_path)
-
-    _walk(data_copy, "")
-    Page.objects.exclude(id__in=id_list).update(status="not_published", path=None)
+    page_nodes = collect_page_nodes(data_copy)
+
+    now = timezone.now()
+    with transaction.atomic():
+        pages = {
+            str(pk): page
+            for pk, page in Page.objects.select_for_update()
+            .in_bulk({page_id for _, page_id, _ in page_nodes})
+            .items()
+        }
+        changed = {}
+        news_path = posters_path = None
+
+        for node, page_id, current_path in page_nodes:
+            page_obj = pages.get(page_id)
+            if page_obj is None:
+                node["page"] = None
+                continue
+
+            if page_obj.has_news:
+                news_path = current_path
+            if page_obj.has_posters:
+                posters_path = current_path
+            if page_obj.path != current_path or page_obj.status != "published":
+                page_obj.path = current_path
+                page_obj.status = "published"
+                page_obj.updated_at = now
+                changed[page_obj.pk] = page_obj
+            node["page"]["path"] = current_path
+
+        Page.objects.bulk_update(changed.values(), ["path", "status", "updated_at"])
+        if news_path is not None:
+            update_news_path(news_path)
+        if posters_path is not None:
+            update_posters_path(posters_path)
+        Page.objects.exclude(id__in=[page.pk for page in pages.values()]).exclude(
+            status="not_published", path__isnull=True
+        ).update(status="not_published", path=None, updated_at=now)
+        bump_model_version(Page)
+
     return data_copy
+
+
+def get_publishable_models():
+    return [
+        model
+        for model in apps.get_app_config("core").get_models()
+        if issubclass(model, BasePublishModel)
+    ]
+
+
+def publish_scheduled_item(model, pk, now=None):
+    now = now or timezone.now()
+    published = model.objects.filter(
+        pk=pk, status="scheduled", published_at__lte=now
+    ).update(status="published", updated_at=now)
+    if published:
+        bump_model_version(model)
+    return published
+
+
+def publish_due_items(now=None):
+    now = now or timezone.now()
+    published = 0
+    for model in get_publishable_models():
+        updated = model.objects.filter(
+            status="scheduled", published_at__lte=now
+        ).update(status="published", updated_at=now)
+        if updated:
+            bump_model_version(model)
+        published += updated
+    return published
+
+
+def expire_popups(pk=None, now=None):
+    now = now or timezone.now()
+    popups = Popup.objects.filter(status="published", end_date__lte=now)
+    if pk is not None:
+        popups = popups.filter(pk=pk)
+    expired = popups.update(status="not_published", published_at=None, updated_at=now)
+    if expired:
+        bump_model_version(Popup)
+    return expired
+
+
+def tag_usage_count():
+    usage = (
+        News.tags.through.objects.filter(tag_id=OuterRef("pk"))
+        .order_by()
+        .values("tag_id")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(usage), 0)
+
+
+def refresh_tag_usage(tag_ids):
+    if not tag_ids:
+        return 0
+    updated = Tag.objects.filter(pk__in=tag_ids).update(
+        times_used=tag_usage_count(), updated_at=timezone.now()
+    )
+    bump_model_version(Tag)
+    return updated
+
+
+def reconcile_tag_usage():
+    drifted = (
+        Tag.objects.annotate(usage=tag_usage_count())
+        .exclude(times_used=F("usage"))
+        .values("pk")
+    )
+    updated = Tag.objects.filter(pk__in=drifted).update(
+        times_used=tag_usage_count(), updated_at=timezone.now()
+    )
+    if updated:
+        bump_model_version(Tag)
+    return updated
+
+
+def with_category_records(queryset):
+    total_records = (
+        Records.objects.filter(
+            Q(category=OuterRef("pk")) | Q(sub_category__category=OuterRef("pk"))
+        )
+        .order_by()
+        .annotate(total=Func(F("pk"), function="COUNT"))
+        .values("total")
+    )
+    return queryset.annotate(total_records=Coalesce(Subquery(total_records), 0))
+
+
+def attach_published_records(categories):
+    categories = list(categories)
+    by_id = {category.pk: category for category in categories}
+    for category in categories:
+        category.published_records = []
+
+    records = (
+        Records.objects.filter(
+            Q(category_id__in=by_id) | Q(sub_category__category_id__in=by_id),
+            status="published",
+        )
+        .annotate(parent_category_id=F("sub_category__category_id"))
+        .order_by("pk")
+    )
+    for record in records:
+        for category_id in {record.category_id, record.parent_category_id}:
+            if category_id in by_id:
+                by_id[category_id].published_records.append(record)
+    return categories
+
+
+def build_subcategory_tree(nodes):
+    """
+    Nests serialized subcategory nodes under their parents. Nodes whose parent
+    is not in the list become roots, so a subtree query yields its own root.
+    """
+    by_id = {node["id"]: dict(node, children=[]) for node in nodes}
+    roots = []
+    for node in by_id.values():
+        parent = by_id.get(node["sub_category"])
+        if parent is None:
+            roots.append(node)
+        else:
+            parent["children"].append(node)
+    return roots
+
+
+def with_unit_relations(queryset):
+    return queryset.prefetch_related("services", "contacts", "emails", "area_of_duty")
+
+
+def filter_units(queryset, params):
+    if params.get("state"):
+        queryset = queryset.filter(state=params["state"])
+    if params.get("city"):
+        queryset = queryset.filter(city__iexact=params["city"])
+    if params.get("core"):
+        queryset = queryset.filter(core_id=params["core"])
+    if params.get("is_principal"):
+        queryset = queryset.filter(
+            is_principal=params["is_principal"].lower() == "true"
+        )
+    return queryset
+
+
+def get_cores_with_units():
+    return Core.objects.filter(Exists(Unit.objects.filter(core=OuterRef("pk"))))
+
+
+def related_row_key(row, model_fields):
+    key = []
+    for field in model_fields:
+        value = row.get(field.name, field.get_default())
+        key.append(getattr(value, "pk", value))
+    return tuple(key)
+
+
+def diff_related_rows(manager, rows, model_fields):
+    """
+    Pairs ``rows`` with the rows behind ``manager``, returning the objects
+    to update, the objects to create and the ids to delete.
+    """
+    existing = defaultdict(list)
+    for obj in manager.all():
+        key = tuple(getattr(obj, field.attname) for field in model_fields)
+        existing[key].append(obj)
+
+    unmatched = []
+    for row in rows:
+        matches = existing.get(related_row_key(row, model_fields))
+        if matches:
+            matches.pop()
+        else:
+            unmatched.append(row)
+
+    leftover = [obj for objs in existing.values() for obj in objs]
+    for obj, row in zip(leftover, unmatched):
+        for field in model_fields:
+            setattr(obj, field.name, row.get(field.name, field.get_default()))
+    reused = min(len(leftover), len(unmatched))
+    to_create = [
+        manager.model(**{manager.field.name: manager.instance}, **row)
+        for row in unmatched[reused:]
+    ]
+    to_delete = [obj.pk for obj in leftover[reused:]]
+    return leftover[:reused], to_create, to_delete
+
+
+def sync_related_rows(manager, rows, fields):
+    """
+    Makes the rows behind a reverse foreign key ``manager`` match ``rows``,
+    a list of dicts keyed by ``fields``. Existing rows already holding the
+    same values are left untouched, the remaining ones are reused for the
+    new values, and whatever is left over is deleted or created in bulk.
+    """
+    model = manager.model
+    model_fields = [model._meta.get_field(name) for name in fields]
+    to_update, to_create, to_delete = diff_related_rows(manager, rows, model_fields)
+
+    update_fields = list(fields)
+    if hasattr(model, "updated_at"):
+        update_fields.append("updated_at")
+        for obj in to_update:
+            obj.updated_at = timezone.now()
+
+    with transaction.atomic():
+        if to_delete:
+            model.objects.filter(pk__in=to_delete).delete()
+        if to_update:
+            model.objects.bulk_update(to_update, update_fields)
+        if to_create:
+            model.objects.bulk_create(to_create)
+
+    if to_delete or to_update or to_create:
+        bump_model_version(model)
+
+
+def reorder_positions(model, ids, group=None):
+    """
+    Applies a full reorder of the rows of ``model`` in ``group``, given as
+    the list of their ids in the new order, with a single UPDATE. The list
+    must hold every row of the group exactly once.
+    """
+    queryset = model.objects.all()
+    if model.position_group:
+        if not group:
+            raise ValueError(f"{model.position_group} é obrigatório")
+        queryset = queryset.filter(**{model.position_group: group})
+
+    with transaction.atomic():
+        model.lock_position_group(group)
+        current = set(queryset.values_list("pk", flat=True))
+        if len(ids) != len(set(ids)) or set(ids) != current:
+            raise ValueError("ids deve conter todos os itens do grupo, uma vez cada")
+        model.apply_order(ids)
+
+    bump_model_version(model)
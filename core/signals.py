@@ -1,16 +1,80 @@
-from django.db.models.signals import m2m_changed
+import logging
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
+from kombu.exceptions import OperationalError
+
+from dpe_core.tasks import expire_popup, publish_scheduled
+
+from .caching import bump_model_version
+from .models import BasePublishModel, News, Popup
+from .services import refresh_tag_usage
+
+logger = logging.getLogger(__name__)
+
+SCHEDULE_FIELDS = {"status", "published_at", "scheduled_at", "start_date", "end_date"}
+
+
+# Users are versioned too, as responses render their names.
+VERSIONED_APPS = {"core", "accounts", "auth"}
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_version_on_write(sender, update_fields=None, **kwargs):
+    if sender._meta.app_label not in VERSIONED_APPS:
+        return
+    # Logging in only stamps last_login, which nothing renders.
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    bump_model_version(sender)
+
+
+@receiver(m2m_changed)
+def bump_version_on_m2m_change(sender, instance, action, model, **kwargs):
+    if action.startswith("post_") and sender._meta.app_label in VERSIONED_APPS:
+        bump_model_version(type(instance), model)
+
+
+def _enqueue(task, args, eta):
+    try:
+        task.apply_async(args=args, eta=eta, retry=False)
+    except OperationalError:
+        logger.warning(
+            "Could not queue %s%r, leaving it to the sweeper.", task.name, args
+        )
+
+
+@receiver(post_save)
+def schedule_publication(sender, instance, update_fields=None, **kwargs):
+    if not isinstance(instance, BasePublishModel):
+        return
+    if update_fields and not SCHEDULE_FIELDS.intersection(update_fields):
+        return
+
+    if instance.status == "scheduled" and instance.published_at:
+        args = (instance._meta.label, instance.pk)
+        eta = instance.published_at
+        transaction.on_commit(lambda: _enqueue(publish_scheduled, args, eta))
 
-from .models import News, Tag
+    if isinstance(instance, Popup) and instance.end_date:
+        if instance.status in ("published", "scheduled"):
+            args = (instance.pk,)
+            eta = instance.end_date
+            transaction.on_commit(lambda: _enqueue(expire_popup, args, eta))
 
 
 @receiver(m2m_changed, sender=News.tags.through)
 def update_times_used(sender, instance, action, reverse, pk_set, **kwargs):
-    if action in ["post_add", "post_remove"]:
-        for tag in Tag.objects.filter(pk__in=pk_set):
-            tag.times_used = tag.news_set.count()
-            tag.save()
+    if reverse:
+        if action in ["post_add", "post_remove", "post_clear"]:
+            refresh_tag_usage([instance.pk])
+    elif action == "pre_clear":
+        instance._cleared_tag_ids = list(
+            sender.objects.filter(news_id=instance.pk).values_list("tag_id", flat=True)
+        )
+    elif action in ["post_add", "post_remove"]:
+        refresh_tag_usage(pk_set)
     elif action == "post_clear":
-        for tag in Tag.objects.all():
-            tag.times_used = tag.news_set.count()
-            tag.save()
+        refresh_tag_usage(getattr(instance, "_cleared_tag_ids", None))
@@ -0,0 +1,356 @@
+import hashlib
+import json
+import logging
+from collections import namedtuple
+from urllib import parse
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Count, Max
+from django.test import RequestFactory
+from django.urls import resolve
+from django.utils import timezone
+
+from core.caching import bump_model_version
+from core.models import (
+    FAQ,
+    AreaOfDuty,
+    Banner,
+    CardRegister,
+    Cards,
+    Category,
+    Contact,
+    Container,
+    Core,
+    Email,
+    Header,
+    News,
+    NewsAttachment,
+    NewsGalleryImage,
+    Page,
+    Popup,
+    Posters,
+    QuickAccessButtons,
+    Records,
+    ServiceButtons,
+    SocialMedia,
+    Subcategory,
+    Tag,
+    Unit,
+    UnitService,
+    WebsiteInformations,
+)
+
+logger = logging.getLogger(__name__)
+
+# A file to publish: where it goes, the API url it is rendered from, the
+# models it reads and, for per-row snapshots, a stamp of the row itself.
+Snapshot = namedtuple("Snapshot", ["path", "url", "models", "stamp"])
+
+MANIFEST_NAME = "manifest.json"
+
+# Bundles that are not a page of their own live under this prefix, which
+# page paths never start with, so the two never share a file.
+BUNDLES_PREFIX = "/_bundles"
+
+NEWS_MODELS = [News, Tag, NewsGalleryImage, NewsAttachment]
+UNIT_MODELS = [Core, Unit, UnitService, Contact, Email, AreaOfDuty]
+PAGE_FLAG_MODELS = {
+    "has_faq": [FAQ],
+    "has_news": NEWS_MODELS,
+    "has_posters": [Posters],
+    "has_cores": UNIT_MODELS,
+    "card": [Cards, CardRegister],
+    "category": [Category, Subcategory, Records],
+}
+
+STATIC_SNAPSHOTS = [
+    Snapshot(
+        f"{BUNDLES_PREFIX}/home.json",
+        "/api/home/",
+        [
+            Banner,
+            ServiceButtons,
+            QuickAccessButtons,
+            Container,
+            Page,
+            Popup,
+            SocialMedia,
+            WebsiteInformations,
+            Header,
+            *NEWS_MODELS,
+        ],
+        None,
+    ),
+    Snapshot(
+        f"{BUNDLES_PREFIX}/cards.json", "/api/cards/", [Cards, CardRegister], None
+    ),
+    Snapshot(
+        f"{BUNDLES_PREFIX}/categories.json",
+        "/api/modules/category/?status=published",
+        [Category, Subcategory, Records],
+        None,
+    ),
+    Snapshot(
+        f"{BUNDLES_PREFIX}/sub-categories.json",
+        "/api/modules/sub-category/tree/",
+        [Subcategory],
+        None,
+    ),
+    Snapshot(
+        f"{BUNDLES_PREFIX}/cores-units.json",
+        "/api/cores-units/?published=true",
+        UNIT_MODELS,
+        None,
+    ),
+]
+
+
+def get_snapshot_root():
+    return getattr(settings, "SNAPSHOT_ROOT", "snapshots").strip("/")
+
+
+def model_fingerprint(model):
+    """
+    Fingerprint of every row of ``model``, read from the database so it is
+    right whichever process made the last write.
+    """
+    result = model.objects.aggregate(last_modified=Max("updated_at"), count=Count("pk"))
+    return f"{result['last_modified']}:{result['count']}"
+
+
+def child_fingerprints(queryset, parent, updated_at="updated_at"):
+    """
+    Fingerprint of the rows of ``queryset`` belonging to each ``parent`` id,
+    so a row's snapshot only depends on its own children.
+    """
+    rows = (
+        queryset.order_by()
+        .values(parent)
+        .annotate(last_modified=Max(updated_at), count=Count("pk"))
+    )
+    return {row[parent]: f"{row['last_modified']}:{row['count']}" for row in rows}
+
+
+def authors_fingerprint(queryset):
+    """
+    Fingerprint of the usernames ``queryset`` renders as its authors' names.
+    Users have no ``updated_at``, so the names themselves are hashed.
+    """
+    authors = (
+        queryset.order_by("author").values_list("author", "author__username").distinct()
+    )
+    return hashlib.md5(repr(list(authors)).encode()).hexdigest()
+
+
+def content_path(path, slug, default_base):
+    """
+    News and posters are served at their path, which update_slug_paths ends
+    in their slug, or under ``default_base`` while they have none.
+    """
+    if path:
+        return f"/{path.strip('/')}.json"
+    return f"/{default_base}/{slug}.json"
+
+
+def card_register_path(path, slug):
+    # Card registers keep the path of their card's page.
+    return f"/{(path or 'cards').strip('/')}/{slug}.json".replace("//", "/")
+
+
+def get_row_snapshots():
+    """
+    One snapshot per public detail, stored under the frontend path it is
+    served at. News and card registers are stamped with the rows nested in
+    them, so a change to one news' gallery only renders that news again.
+    Pages are stamped with the profiles of their allowed users and, when
+    they list the FAQ, with the names of its authors.
+    """
+    pages = Page.objects.filter(path__isnull=False).annotate(
+        users=Count("allowed_users"), users_modified=Max("allowed_users__updated_at")
+    )
+    faq_authors = authors_fingerprint(FAQ.objects.filter(status="published"))
+    for page in pages.values(
+        "id", "path", "updated_at", "users", "users_modified", *PAGE_FLAG_MODELS
+    ):
+        models = [
+            model
+            for flag, flag_models in PAGE_FLAG_MODELS.items()
+            if page[flag]
+            for model in flag_models
+        ]
+        stamp = [page["updated_at"].isoformat(), page["users"], page["users_modified"]]
+        if page["has_faq"]:
+            stamp.append(faq_authors)
+        yield Snapshot(
+            f"/{page['path'].strip('/') or 'index'}.json",
+            f"/api/page/bundle/?id={page['id']}",
+            models,
+            ":".join(map(str, stamp)),
+        )
+
+    yield from get_news_snapshots()
+
+    posters = Posters.objects.filter(status="published")
+    for path, slug, updated_at in posters.values_list("path", "slug", "updated_at"):
+        yield Snapshot(
+            content_path(path, slug, "cartilhas"),
+            f"/api/posters/{slug}/",
+            [],
+            updated_at.isoformat(),
+        )
+
+    # A card register embeds its card and the latest registers next to it.
+    cards = dict(Cards.objects.values_list("pk", "updated_at"))
+    card_registers = child_fingerprints(CardRegister.objects.all(), "card")
+    registers = CardRegister.objects.filter(status="published")
+    for path, slug, card_id in registers.values_list("path", "slug", "card"):
+        yield Snapshot(
+            card_register_path(path, slug),
+            f"/api/card-register/{slug}/",
+            [],
+            f"{cards.get(card_id)}:{card_registers.get(card_id)}",
+        )
+
+
+def get_news_snapshots():
+    tags = child_fingerprints(
+        News.tags.through.objects.all(), "news", "tag__updated_at"
+    )
+    gallery = child_fingerprints(NewsGalleryImage.objects.all(), "news")
+    attachments = child_fingerprints(NewsAttachment.objects.all(), "news")
+
+    news = News.objects.filter(status="published", published_at__lte=timezone.now())
+    for pk, path, slug, updated_at in news.values_list(
+        "pk", "path", "slug", "updated_at"
+    ):
+        yield Snapshot(
+            content_path(path, slug, "noticias"),
+            f"/api/news/{slug}/",
+            [],
+            ":".join(
+                [
+                    updated_at.isoformat(),
+                    str(tags.get(pk)),
+                    str(gallery.get(pk)),
+                    str(attachments.get(pk)),
+                ]
+            ),
+        )
+
+
+class SnapshotPublisher:
+    """
+    Renders the public API to JSON files in ``default_storage``.
+
+    A manifest kept next to the files records the dependency fingerprints
+    each file was rendered from, so a run only renders the files whose rows
+    or dependencies changed since the previous one and removes the files
+    whose content is gone.
+    """
+
+    def __init__(self, storage=None, base_url=None):
+        self.storage = storage or default_storage
+        self.root = get_snapshot_root()
+        base_url = base_url or getattr(
+            settings, "SNAPSHOT_BASE_URL", "http://localhost"
+        )
+        parts = parse.urlsplit(base_url)
+        self.factory = RequestFactory(
+            HTTP_HOST=parts.netloc, secure=parts.scheme == "https"
+        )
+
+    def storage_name(self, path):
+        return f"{self.root}{path}"
+
+    def load_manifest(self):
+        name = self.storage_name(f"/{MANIFEST_NAME}")
+        if not self.storage.exists(name):
+            return {"models": {}, "files": {}}
+        with self.storage.open(name) as manifest:
+            return json.load(manifest)
+
+    def write(self, path, content):
+        name = self.storage_name(path)
+        if self.storage.exists(name):
+            self.storage.delete(name)
+        self.storage.save(name, ContentFile(content))
+
+    def render(self, url):
+        request = self.factory.get(url)
+        match = resolve(parse.urlsplit(url).path)
+        response = match.func(request, *match.args, **match.kwargs)
+        if hasattr(response, "render"):
+            response.render()
+        if response.status_code != 200:
+            return None
+        return response.content
+
+    def publish(self, force=False):
+        manifest = {"models": {}, "files": {}} if force else self.load_manifest()
+        snapshots = STATIC_SNAPSHOTS + list(get_row_snapshots())
+
+        # Per-row snapshots stamp their own rows, but the row models still
+        # take part in the fingerprints so their versions get bumped below.
+        models = {Page, Posters, Cards, CardRegister, *NEWS_MODELS}
+        models.update(model for snapshot in snapshots for model in snapshot.models)
+        fingerprints = {
+            model._meta.label_lower: model_fingerprint(model) for model in models
+        }
+
+        # Response caches are keyed on model versions, which other processes
+        # may not have bumped here; bump whatever the database says changed.
+        changed = [
+            model
+            for model in models
+            if manifest["models"].get(model._meta.label_lower)
+            != fingerprints[model._meta.label_lower]
+        ]
+        bump_model_version(*changed)
+
+        files = {}
+        rendered = []
+        claimed = set()
+        for snapshot in snapshots:
+            if snapshot.path in claimed:
+                # Never let one snapshot silently overwrite another.
+                logger.warning(
+                    "Snapshot %s of %s skipped, its path is taken.",
+                    snapshot.path,
+                    snapshot.url,
+                )
+                continue
+            claimed.add(snapshot.path)
+
+            stamp = ":".join(
+                [str(snapshot.stamp)]
+                + [fingerprints[model._meta.label_lower] for model in snapshot.models]
+            )
+            stamp = hashlib.md5(stamp.encode()).hexdigest()
+            if manifest["files"].get(snapshot.path) == stamp:
+                files[snapshot.path] = stamp
+                continue
+
+            content = self.render(snapshot.url)
+            if content is None:
+                continue
+            self.write(snapshot.path, content)
+            files[snapshot.path] = stamp
+            rendered.append(snapshot.path)
+
+        removed = [path for path in manifest["files"] if path not in files]
+        for path in removed:
+            name = self.storage_name(path)
+            if self.storage.exists(name):
+                self.storage.delete(name)
+
+        self.write(
+            f"/{MANIFEST_NAME}",
+            json.dumps({"models": fingerprints, "files": files}).encode(),
+        )
+        return {"rendered": len(rendered), "removed": len(removed)}
+
+
+def publish_snapshots(force=False):
+    return SnapshotPublisher().publish(force=force)
@@ -0,0 +1,852 @@
+import io
+from datetime import date, datetime
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+
+import msgpack
+import orjson
+import pytest
+from django.contrib.auth.models import update_last_login
+from django.core.exceptions import ValidationError
+from django.core.files.storage import InMemoryStorage
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core import counters
+from core.caching import get_models_version
+from core.loading import EagerLoadingPlan
+from core.models import (
+    Banner,
+    Category,
+    Core,
+    News,
+    NewsGalleryImage,
+    Page,
+    Popup,
+    Posters,
+    Subcategory,
+    Tag,
+)
+from core.parsers import MessagePackParser, ORJSONParser
+from core.readers import compile_reader
+from core.renderers import MessagePackRenderer, ORJSONRenderer
+from core.serializers import (
+    BannerSerializer,
+    CardRegisterSerializer,
+    ContainerSerializer,
+    CoresAndUnitSerializer,
+    FAQSerializer,
+    NewsSerializer,
+    PostersSerializer,
+    QuickAccessButtonsSerializer,
+    RecordsSerializer,
+    ServiceButtonsSerializer,
+    SocialMediaSerializer,
+    SubcategorySerializer,
+)
+from core.services import update_news_path, update_pages_path, update_posters_path
+from core.snapshots import SnapshotPublisher
+
+# Every public GET route with the most queries it may run. The budgets do
+# not depend on how many rows exist: each test runs at two volumes and a
+# serializer that queries once per row breaks the larger one. The cache is
+# cold, so cached routes also count one aggregate per model they are tagged
+# with, which their ETag and Last-Modified are built from.
+VOLUMES = [2, 8]
+
+ROUTES = [
+    ("faq-list", lambda data: reverse("faq-list-create"), 4),
+    ("faq-published", lambda data: reverse("faq-list-create") + "?published=true", 4),
+    ("faq-detail", lambda data: reverse("faq-detail", args=[data["faq"].pk]), 4),
+    ("unit-list", lambda data: reverse("unit-list-create"), 10),
+    ("unit-detail", lambda data: reverse("unit-detail", args=[data["unit"].pk]), 10),
+    ("core-list", lambda data: reverse("core-list-create"), 2),
+    ("core-detail", lambda data: reverse("core-detail", args=[data["core"].pk]), 2),
+    ("core-units", lambda data: reverse("core-units", args=[data["core"].pk]), 12),
+    ("cores-units", lambda data: reverse("cores-units-list"), 12),
+    (
+        "cores-units-published",
+        lambda data: reverse("cores-units-list") + "?published=true",
+        12,
+    ),
+    ("home", lambda data: reverse("home"), 25),
+    ("area-of-duty-list", lambda data: reverse("area_of_duty-list-create"), 2),
+    (
+        "area-of-duty-detail",
+        lambda data: reverse("area_of_duty-detail", args=[data["area_of_duty"].pk]),
+        2,
+    ),
+    ("type-of-service-list", lambda data: reverse("type_of_service-list-create"), 2),
+    (
+        "type-of-service-detail",
+        lambda data: reverse(
+            "type_of_service-detail", args=[data["type_of_service"].pk]
+        ),
+        2,
+    ),
+    ("popup-list", lambda data: reverse("popup-list-create"), 2),
+    ("popup-detail", lambda data: reverse("popup-detail", args=[data["popup"].pk]), 2),
+    ("tag-list", lambda data: reverse("tag-list-create"), 2),
+    ("tag-detail", lambda data: reverse("tag-detail", args=[data["tag"].pk]), 2),
+    ("area-of-activity-list", lambda data: reverse("area_of_activity-list-create"), 2),
+    (
+        "area-of-activity-detail",
+        lambda data: reverse(
+            "area_of_activity-detail", args=[data["area_of_activity"].pk]
+        ),
+        2,
+    ),
+    (
+        "website-information",
+        lambda data: reverse("website_information-list-create-detail"),
+        2,
+    ),
+    ("social-media-list", lambda data: reverse("social_media-list-create"), 2),
+    (
+        "social-media-detail",
+        lambda data: reverse("social_media-detail", args=[data["social_media"].pk]),
+        2,
+    ),
+    ("email-website-list", lambda data: reverse("email-website-list-create"), 2),
+    (
+        "email-website-detail",
+        lambda data: reverse("email-website-detail", args=[data["email_website"].pk]),
+        2,
+    ),
+    ("news-list", lambda data: reverse("news-list-create"), 8),
+    (
+        "news-published",
+        lambda data: reverse("news-list-create") + "?published=true",
+        8,
+    ),
+    ("news-detail", lambda data: reverse("news-detail", args=[data["news"].pk]), 8),
+    (
+        "news-slug",
+        lambda data: reverse("news-detail", args=[data["news"].slug]),
+        8,
+    ),
+    ("card-register-list", lambda data: reverse("card_register-list-create"), 5),
+    (
+        "card-register-detail",
+        lambda data: reverse("card_register-detail", args=[data["card_register"].pk]),
+        5,
+    ),
+    (
+        "card-register-slug",
+        lambda data: reverse("card_register-detail", args=[data["card_register"].slug]),
+        5,
+    ),
+    ("news-gallery-list", lambda data: reverse("news_gallery-list-create"), 2),
+    (
+        "news-gallery-detail",
+        lambda data: reverse("news_gallery-detail", args=[data["gallery_image"].pk]),
+        2,
+    ),
+    ("news-attachment-list", lambda data: reverse("news_attachment-list-create"), 2),
+    (
+        "news-attachment-detail",
+        lambda data: reverse("news_attachment-detail", args=[data["attachment"].pk]),
+        2,
+    ),
+    ("cards-list", lambda data: reverse("cards-list-create"), 4),
+    ("cards-detail", lambda data: reverse("cards-detail", args=[data["card"].pk]), 4),
+    ("page-list", lambda data: reverse("page-list-create"), 4),
+    ("page-detail", lambda data: reverse("page-detail", args=[data["page"].pk]), 4),
+    (
+        "page-path",
+        lambda data: reverse("page-list-create") + f"?path={data['page'].path}",
+        6,
+    ),
+    (
+        "page-route",
+        lambda data: reverse("page-route") + f"?path={data['page'].path}",
+        4,
+    ),
+    (
+        "page-bundle",
+        lambda data: reverse("page-bundle") + f"?path={data['page'].path}",
+        44,
+    ),
+    (
+        "page-bundle-detail",
+        lambda data: reverse("page-bundle-detail", args=[data["page"].pk]),
+        42,
+    ),
+    ("posters-list", lambda data: reverse("posters-list-create"), 2),
+    (
+        "posters-published",
+        lambda data: reverse("posters-list-create") + "?published=true",
+        2,
+    ),
+    (
+        "posters-detail",
+        lambda data: reverse("posters-detail", args=[data["poster"].pk]),
+        2,
+    ),
+    (
+        "posters-slug",
+        lambda data: reverse("posters-detail-slug", args=[data["poster"].slug]),
+        2,
+    ),
+    ("category-list", lambda data: reverse("category-list-create"), 7),
+    (
+        "category-published",
+        lambda data: reverse("category-list-create") + "?status=published",
+        7,
+    ),
+    (
+        "category-detail",
+        lambda data: reverse("category-detail", args=[data["category"].pk]),
+        7,
+    ),
+    ("sub-category-list", lambda data: reverse("sub_category-list-create"), 5),
+    (
+        "sub-category-detail",
+        lambda data: reverse("sub_category-detail", args=[data["subcategory"].pk]),
+        5,
+    ),
+    ("sub-category-tree", lambda data: reverse("sub_category-tree"), 2),
+    (
+        "sub-category-subtree",
+        lambda data: reverse("sub_category-subtree", args=[data["root"].pk]),
+        3,
+    ),
+    (
+        "sub-category-ancestors",
+        lambda data: reverse("sub_category-ancestors", args=[data["subcategory"].pk]),
+        3,
+    ),
+    ("records-list", lambda data: reverse("records-list-create"), 2),
+    (
+        "records-detail",
+        lambda data: reverse("records-detail", args=[data["record"].pk]),
+        2,
+    ),
+    ("banner-list", lambda data: reverse("banner-list-create"), 2),
+    (
+        "banner-detail",
+        lambda data: reverse("banner-detail", args=[data["banner"].pk]),
+        2,
+    ),
+    ("container-list", lambda data: reverse("container-list-create"), 3),
+    (
+        "container-detail",
+        lambda data: reverse("container-detail", args=[data["container"].pk]),
+        3,
+    ),
+    ("service-buttons-list", lambda data: reverse("service_buttons-list-create"), 2),
+    (
+        "service-buttons-detail",
+        lambda data: reverse(
+            "service_buttons-detail", args=[data["service_button"].pk]
+        ),
+        2,
+    ),
+    (
+        "quick-access-buttons-list",
+        lambda data: reverse("quick_access_buttons-list-create"),
+        2,
+    ),
+    (
+        "quick-access-buttons-detail",
+        lambda data: reverse(
+            "quick_access_buttons-detail", args=[data["quick_access_button"].pk]
+        ),
+        2,
+    ),
+    ("header-list", lambda data: reverse("header-list-create"), 2),
+    (
+        "header-detail",
+        lambda data: reverse("header-detail", args=[data["header"].pk]),
+        2,
+    ),
+]
+
+
+@pytest.mark.parametrize("volume", VOLUMES)
+@pytest.mark.parametrize(
+    "url, budget",
+    [pytest.param(url, budget, id=name) for name, url, budget in ROUTES],
+)
+def test_public_route_query_budget(
+    api_client, seed, django_assert_max_num_queries, volume, url, budget
+):
+    path = url(seed(volume))
+
+    with django_assert_max_num_queries(budget):
+        response = api_client.get(path)
+
+    assert response.status_code == 200
+
+
+# Sparse fieldsets: the keys each url renders and the most queries it may
+# run, which drops once the nested relations are left out.
+SPARSE_ROUTES = [
+    (
+        "news-fields",
+        lambda: reverse("news-list-create")
+        + "?published=true&fields=id,title,slug,thumbnail",
+        {"id", "title", "slug", "thumbnail"},
+        5,
+    ),
+    (
+        "card-register-fields",
+        lambda: reverse("card_register-list-create") + "?fields=id,title,slug",
+        {"id", "title", "slug"},
+        3,
+    ),
+    (
+        "card-register-expand",
+        lambda: reverse("card_register-list-create")
+        + "?fields=id,title&expand=related_cards",
+        {"id", "title", "related_cards"},
+        4,
+    ),
+    (
+        "cards-exclude",
+        lambda: reverse("cards-list-create") + "?exclude=path,author",
+        {"id", "title", "status", "created_at", "updated_at", "published_at"},
+        3,
+    ),
+    (
+        "faq-fields",
+        lambda: reverse("faq-list-create") + "?fields=id,question,author_name",
+        {"id", "question", "author_name"},
+        4,
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "url, keys, budget",
+    [
+        pytest.param(url, keys, budget, id=name)
+        for name, url, keys, budget in SPARSE_ROUTES
+    ],
+)
+def test_sparse_fieldsets(
+    api_client, seed, django_assert_max_num_queries, url, keys, budget
+):
+    seed(8)
+
+    with django_assert_max_num_queries(budget):
+        response = api_client.get(url())
+
+    assert response.status_code == 200
+    rows = (
+        response.data.get("results")
+        if isinstance(response.data, dict)
+        else response.data
+    )
+    assert rows
+    assert all(set(row) == keys for row in rows)
+
+
+def test_fieldsets_leave_default_output_alone(api_client, seed):
+    seed(2)
+    url = reverse("card_register-list-create")
+
+    full = api_client.get(url).data
+    expanded = api_client.get(url + "?expand=card_detail,related_cards").data
+
+    assert "card_detail" in full[0] and "related_cards" in full[0]
+    assert expanded == full
+
+
+def lookup_paths(plan):
+    return {getattr(lookup, "prefetch_to", lookup) for lookup in plan.prefetch}
+
+
+@pytest.mark.parametrize(
+    "serializer_class, select, prefetch",
+    [
+        (SubcategorySerializer, {"category", "sub_category"}, {"records"}),
+        (
+            CardRegisterSerializer,
+            {"card"},
+            {"card__registers", "card__latest_registers"},
+        ),
+        (ContainerSerializer, {"internal_link"}, set()),
+        (CoresAndUnitSerializer, set(), {"published_units"}),
+        (NewsSerializer, set(), {"tags", "gallery", "attachments"}),
+    ],
+)
+def test_eager_loading_plan(serializer_class, select, prefetch):
+    plan = EagerLoadingPlan(serializer_class())
+
+    assert set(plan.select) == select
+    assert lookup_paths(plan) == prefetch
+
+
+def test_snapshot_paths(seed):
+    data = seed(2)
+    update_news_path("/noticias")
+    update_posters_path("/cartilhas")
+    Page.objects.create(title="Home", path="/home", status="published")
+    publisher = SnapshotPublisher(storage=InMemoryStorage())
+
+    publisher.publish()
+
+    news = data["news"]
+    news.refresh_from_db()
+    poster = data["poster"]
+    for path in [
+        f"/noticias/{news.slug}.json",
+        f"/cartilhas/{poster.slug}.json",
+        "/home.json",
+        "/_bundles/home.json",
+    ]:
+        assert publisher.storage.exists(publisher.storage_name(path))
+
+
+def test_snapshots_render_only_changed_rows(seed):
+    data = seed(2)
+    update_news_path("/noticias")
+    publisher = SnapshotPublisher(storage=InMemoryStorage())
+    publisher.publish()
+    before = publisher.load_manifest()["files"]
+
+    NewsGalleryImage.objects.create(news=data["news"], image="news/gallery/new.png")
+    publisher.publish()
+    after = publisher.load_manifest()["files"]
+
+    changed = {path for path in after if after[path] != before.get(path)}
+    news_paths = {path for path in after if path.startswith("/noticias/")}
+    assert changed & news_paths == {f"/noticias/{data['news'].slug}.json"}
+
+
+def test_snapshots_follow_authors_and_profiles(seed):
+    data = seed(2)
+    publisher = SnapshotPublisher(storage=InMemoryStorage())
+    publisher.publish()
+
+    author = data["faq"].author
+    profile = data["page"].allowed_users.first()
+    for row, field in [(author, "username"), (profile, "name")]:
+        before = publisher.load_manifest()["files"]
+        setattr(row, field, "renamed")
+        row.save()
+        publisher.publish()
+        after = publisher.load_manifest()["files"]
+
+        assert after["/servicos.json"] != before["/servicos.json"]
+
+
+# Bundle routes with a write that changes what they render.
+CONDITIONAL_ROUTES = [
+    (
+        "home",
+        lambda data: reverse("home"),
+        lambda data: Banner.objects.filter(pk=data["banner"].pk).delete(),
+    ),
+    (
+        "page-bundle",
+        lambda data: reverse("page-bundle-detail", args=[data["page"].pk]),
+        lambda data: data["faq"].delete(),
+    ),
+    (
+        "page-route",
+        lambda data: reverse("page-route") + "?path=/servicos",
+        lambda data: Page.objects.create(title="Nova", path="/nova"),
+    ),
+    (
+        "cores-units",
+        lambda data: reverse("cores-units-list"),
+        lambda data: Core.objects.create(core_name="Novo núcleo"),
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "url, write",
+    [pytest.param(url, write, id=name) for name, url, write in CONDITIONAL_ROUTES],
+)
+def test_conditional_requests(
+    api_client, seed, django_capture_on_commit_callbacks, url, write
+):
+    data = seed(2)
+    path = url(data)
+
+    etag = api_client.get(path)["ETag"]
+    response = api_client.get(path, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+    with django_capture_on_commit_callbacks(execute=True):
+        write(data)
+
+    response = api_client.get(path, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+def banner_order():
+    return list(
+        Banner.objects.filter(group="slides")
+        .order_by("position")
+        .values_list("alt", flat=True)
+    )
+
+
+@pytest.fixture
+def banners(author):
+    return [
+        Banner.objects.create(
+            banner="banner/images/banner.png",
+            alt=alt,
+            group="slides",
+            slot=index + 1,
+            author=author,
+        )
+        for index, alt in enumerate("ABCD")
+    ]
+
+
+def test_position_insert(author, banners):
+    # Enough inserts into the same gap to use it up and renumber the group.
+    for index in range(12):
+        Banner.objects.create(
+            banner="banner/images/banner.png",
+            alt=f"E{index}",
+            group="slides",
+            slot=2,
+            author=author,
+        )
+
+    inserted = [f"E{index}" for index in reversed(range(12))]
+    assert banner_order() == ["A", *inserted, "B", "C", "D"]
+
+
+def test_position_move(auth_client, banners):
+    url = reverse("banner-detail", args=[banners[3].pk])
+
+    response = auth_client.patch(url, {"slot": 1}, format="json")
+
+    assert response.status_code == 200
+    assert "slot" not in response.data
+    assert banner_order() == ["D", "A", "B", "C"]
+
+    # The position itself is only a sort key, and writing it is an error.
+    response = auth_client.patch(url, {"position": 4}, format="json")
+    assert response.status_code == 400
+    assert "position" in response.data
+    assert banner_order() == ["D", "A", "B", "C"]
+
+
+def test_position_reorder(staff_client, banners):
+    ids = [banner.pk for banner in reversed(banners)]
+
+    response = staff_client.patch(
+        reverse("banner-reorder"), {"ids": ids, "group": "slides"}, format="json"
+    )
+
+    assert response.status_code == 200
+    assert [row["id"] for row in response.data] == ids
+    assert banner_order() == ["D", "C", "B", "A"]
+
+
+@pytest.fixture
+def subcategory_tree(db):
+    category = Category.objects.create(title="Categoria")
+    nodes = {}
+    for name, parent in [("a", None), ("b", "a"), ("c", "b"), ("x", None)]:
+        nodes[name] = Subcategory.objects.create(
+            title=name, category=category, sub_category=nodes.get(parent)
+        )
+    return nodes
+
+
+def test_subcategory_move_rewrites_subtree(subcategory_tree):
+    a, b, c, x = (subcategory_tree[name] for name in "abcx")
+
+    b.sub_category = x
+    b.save()
+
+    c.refresh_from_db()
+    assert (b.tree_path, b.depth) == (f"/{x.pk}/{b.pk}/", 1)
+    assert (c.tree_path, c.depth) == (f"/{x.pk}/{b.pk}/{c.pk}/", 2)
+    assert list(c.get_ancestors()) == [x, b]
+    assert not a.get_descendants().exists()
+
+    b.sub_category = None
+    b.save()
+
+    c.refresh_from_db()
+    assert (c.tree_path, c.depth) == (f"/{b.pk}/{c.pk}/", 1)
+
+
+def test_subcategory_cycle_rejected(staff_client, subcategory_tree):
+    a, c = subcategory_tree["a"], subcategory_tree["c"]
+
+    a.sub_category = c
+    with pytest.raises(ValidationError):
+        a.save()
+
+    for parent in [a, c]:
+        response = staff_client.patch(
+            reverse("sub_category-detail", args=[a.pk]),
+            {"sub_category": parent.pk},
+            format="json",
+        )
+        assert response.status_code == 400
+        assert "sub_category" in response.data
+
+    a.refresh_from_db()
+    assert (a.sub_category_id, a.tree_path) == (None, f"/{a.pk}/")
+
+
+def test_subcategory_tree_params(api_client, subcategory_tree):
+    a, b = subcategory_tree["a"], subcategory_tree["b"]
+
+    # max_depth counts from the subtree's root, not from the top level.
+    response = api_client.get(
+        reverse("sub_category-subtree", args=[b.pk]) + "?max_depth=0"
+    )
+    assert [node["id"] for node in response.data] == [b.pk]
+    assert response.data[0]["children"] == []
+
+    response = api_client.get(reverse("sub_category-tree") + "?max_depth=1")
+    assert {node["id"] for node in response.data} == {a.pk, subcategory_tree["x"].pk}
+    assert [node["id"] for node in response.data[0]["children"]] == [b.pk]
+
+    for query in ["?category=abc", "?max_depth=um"]:
+        response = api_client.get(reverse("sub_category-tree") + query)
+        assert response.status_code == 400
+
+
+def related_rows(manager):
+    return {row.pk: row for row in manager.all()}
+
+
+def test_unit_patch_syncs_nested_rows(staff_client, seed):
+    unit = seed(2)["unit"]
+    unit.emails.create(email="outra@example.com")
+    kept, changed = unit.emails.order_by("pk")
+    services = related_rows(unit.services)
+
+    response = staff_client.patch(
+        reverse("unit-detail", args=[unit.pk]),
+        {"emails": [{"email": kept.email}, {"email": "nova@example.com"}]},
+        format="json",
+    )
+
+    assert response.status_code == 200
+    after = related_rows(unit.emails)
+    # Same ids: the unchanged row is left alone, the other updated in place.
+    assert set(after) == {kept.pk, changed.pk}
+    assert after[kept.pk].updated_at == kept.updated_at
+    assert after[changed.pk].email == "nova@example.com"
+    # Services were not sent, so their rows are untouched.
+    assert {pk: row.updated_at for pk, row in related_rows(unit.services).items()} == {
+        pk: row.updated_at for pk, row in services.items()
+    }
+
+
+def times_used(*tags):
+    return [Tag.objects.get(pk=tag.pk).times_used for tag in tags]
+
+
+def test_tag_times_used(author):
+    first, second, third = (Tag.objects.create(name_tag=f"tag-{i}") for i in range(3))
+    news = News.objects.create(
+        title="Notícia", text="Texto", thumbnail="thumbnails/news.png", author=author
+    )
+    other = News.objects.create(
+        title="Outra", text="Texto", thumbnail="thumbnails/news.png", author=author
+    )
+
+    news.tags.set([first, second])
+    assert times_used(first, second, third) == [1, 1, 0]
+
+    news.tags.set([second, third])
+    assert times_used(first, second, third) == [0, 1, 1]
+
+    # Adding from the tag's side counts as well.
+    third.news_set.add(other)
+    assert times_used(first, second, third) == [0, 1, 2]
+
+    news.tags.clear()
+    assert times_used(first, second, third) == [0, 0, 1]
+
+    third.news_set.clear()
+    assert times_used(first, second, third) == [0, 0, 0]
+
+
+def test_popup_counters_flush(api_client, author, monkeypatch):
+    buffer = counters.LocalCounterBuffer()
+    monkeypatch.setattr(counters, "_buffer", buffer)
+    popup = Popup.objects.create(title="Popup", click=5)
+    url = reverse("popup-increase-click", args=[popup.pk])
+
+    responses = [api_client.post(url).data["Clicks"] for _ in range(3)]
+    api_client.post(reverse("popup-increase-visualization", args=[popup.pk]))
+
+    # Counted right away, written only when the buffer is flushed.
+    assert responses == [6, 7, 8]
+    popup.refresh_from_db()
+    assert (popup.click, popup.visualization) == (5, 0)
+
+    version = get_models_version([Popup])
+    assert counters.flush_popup_counters() == 1
+    popup.refresh_from_db()
+    assert (popup.click, popup.visualization) == (8, 1)
+    assert counters.flush_popup_counters() == 0
+    assert get_models_version([Popup]) == version
+
+    # The counters are left out of the public list, not of the staff one.
+    assert "click" not in api_client.get(reverse("popup-list-create")).data[0]
+    api_client.force_authenticate(author)
+    assert api_client.get(reverse("popup-list-create")).data[0]["click"] == 8
+
+
+RENDER_DATA = {
+    "title": "Notícia \u2028 com separador",
+    "published_at": datetime(2024, 5, 1, 12, 30, tzinfo=dt_timezone.utc),
+    "day": date(2024, 5, 1),
+    "price": Decimal("10.50"),
+    "tags": [{"id": 1, "name": "tag"}, None, True, 1.5],
+}
+
+
+def test_renderers_round_trip():
+    json_bytes = JSONRenderer().render(RENDER_DATA)
+    orjson_bytes = ORJSONRenderer().render(RENDER_DATA)
+    msgpack_bytes = MessagePackRenderer().render(RENDER_DATA)
+
+    assert orjson_bytes == json_bytes
+    expected = JSONParser().parse(io.BytesIO(json_bytes))
+    assert ORJSONParser().parse(io.BytesIO(orjson_bytes)) == expected
+    assert MessagePackParser().parse(io.BytesIO(msgpack_bytes)) == expected
+
+
+def test_msgpack_response_matches_json(api_client, seed):
+    seed(2)
+    url = reverse("news-list-create") + "?published=true"
+
+    as_json = api_client.get(url)
+    as_msgpack = api_client.get(url, HTTP_ACCEPT=MessagePackRenderer.media_type)
+
+    assert as_msgpack["Content-Type"] == MessagePackRenderer.media_type
+    assert msgpack.unpackb(as_msgpack.content) == orjson.loads(as_json.content)
+
+
+@pytest.mark.parametrize(
+    "serializer_class",
+    [
+        FAQSerializer,
+        PostersSerializer,
+        BannerSerializer,
+        RecordsSerializer,
+        SocialMediaSerializer,
+        ServiceButtonsSerializer,
+        QuickAccessButtonsSerializer,
+    ],
+)
+def test_compiled_reader_matches_serializer(seed, serializer_class):
+    seed(2)
+    request = Request(APIRequestFactory().get("/"))
+    context = {"request": request}
+    queryset = serializer_class.Meta.model.objects.order_by("pk")
+    reader = compile_reader(serializer_class)
+
+    assert reader is not None
+    renderer = ORJSONRenderer()
+    assert renderer.render(reader.read(queryset, context)) == renderer.render(
+        serializer_class(queryset, many=True, context=context).data
+    )
+
+
+def test_update_pages_path(seed):
+    data = seed(2)
+    page, news = data["page"], data["news"]
+    child = Page.objects.create(title="Filha", has_posters=True)
+    orphan = Page.objects.get(path="/paginas/0")
+
+    structure = update_pages_path(
+        [
+            {
+                "name": "Institucional",
+                "children": [
+                    {"name": "Serviços", "page": {"id": page.pk}},
+                    {"name": "Cartilhas", "page": {"id": child.pk}},
+                    {"name": "Removida", "page": {"id": 999999}},
+                ],
+            }
+        ]
+    )
+
+    paths = dict(Page.objects.values_list("pk", "path"))
+    assert paths[page.pk] == "/institucional/servicos"
+    assert paths[child.pk] == "/institucional/cartilhas"
+    assert paths[orphan.pk] is None
+    assert Page.objects.get(pk=child.pk).status == "published"
+    children = structure[0]["children"]
+    assert children[0]["page"]["path"] == "/institucional/servicos"
+    assert children[2]["page"] is None
+    news.refresh_from_db()
+    assert news.path == f"/institucional/servicos/{news.slug}"
+
+
+def test_posters_feed_pages_through_null_published_at(api_client, seed):
+    seed(8)
+    legacy = list(Posters.objects.order_by("pk").values_list("pk", flat=True)[::2])
+    Posters.objects.filter(pk__in=legacy).update(published_at=None)
+    expected = list(
+        Posters.objects.filter(status="published")
+        .order_by(Coalesce("published_at", "created_at").desc(), "-id")
+        .values_list("pk", flat=True)
+    )
+
+    seen = []
+    url = reverse("posters-list-create") + "?published=true&page_size=3"
+    while url:
+        response = api_client.get(url)
+        assert response.status_code == 200
+        seen.extend(row["id"] for row in response.data["results"])
+        url = response.data["next"]
+
+    assert seen == expected
+
+
+def test_faq_cache_follows_author_name(
+    api_client, seed, django_capture_on_commit_callbacks
+):
+    data = seed(2)
+    url = reverse("faq-list-create")
+    etag = api_client.get(url)["ETag"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        update_last_login(None, data["faq"].author)
+    assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    author = data["faq"].author
+    author.username = "renamed"
+    with django_capture_on_commit_callbacks(execute=True):
+        author.save()
+
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert {row["author_name"] for row in response.data} == {"renamed"}
+
+
+def test_page_bundle_follows_authors_and_profiles(
+    api_client, seed, django_capture_on_commit_callbacks
+):
+    data = seed(2)
+    url = reverse("page-bundle-detail", args=[data["page"].pk])
+    api_client.get(url)
+
+    author = data["faq"].author
+    author.username = "renamed"
+    profile = data["page"].allowed_users.first()
+    profile.name = "Renamed"
+    with django_capture_on_commit_callbacks(execute=True):
+        author.save()
+        profile.save()
+
+    response = api_client.get(url)
+    assert {row["author_name"] for row in response.data["faq"]} == {"renamed"}
+    assert "Renamed" in [row["name"] for row in response.data["page"]["allowed_users"]]
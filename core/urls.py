@@ -4,6 +4,7 @@ from core.views import (
     AreaOfActivityView,
     AreaOfDutyView,
     AuthorsByModel,
+    BannerReorderView,
     BannerView,
     CardRegisterView,
     CardsView,
@@ -15,18 +16,25 @@ from core.views import (
     EmailWebsiteView,
     FaqView,
     HeaderView,
+    HomeView,
     NewsAttachmentView,
     NewsGalleryImageView,
     NewsView,
+    PageBundleView,
+    PageRouteView,
     PageView,
     PopupIncrementClickView,
     PopupIncrementVisualizationView,
     PopupView,
     PostersView,
+    QuickAccessButtonsReorderView,
     QuickAccessButtonsView,
     RecordsView,
+    ServiceButtonsReorderView,
     ServiceButtonsView,
     SocialMediaView,
+    SubcategoryAncestorsView,
+    SubcategoryTreeView,
     SubcategoryView,
     TagView,
     TypeOfServiceView,
@@ -43,6 +51,7 @@ urlpatterns = [
     path("core/<int:pk>/", CoreView.as_view(), name="core-detail"),
     path("core/<int:pk>/units/", CoreUnitsView.as_view(), name="core-units"),
     path("cores-units/", CoresAndUnitView.as_view(), name='cores-units-list'),
+    path("home/", HomeView.as_view(), name="home"),
     path("area-of-duty/", AreaOfDutyView.as_view(), name="area_of_duty-list-create"),
     path(
         "area-of-duty/<int:pk>/", AreaOfDutyView.as_view(), name="area_of_duty-detail"
@@ -139,6 +148,9 @@ urlpatterns = [
     path("cards/<int:pk>/", CardsView.as_view(), name="cards-detail"),
     path("page/", PageView.as_view(), name="page-list-create"),
     path("page/<int:pk>/", PageView.as_view(), name="page-detail"),
+    path("page/route/", PageRouteView.as_view(), name="page-route"),
+    path("page/bundle/", PageBundleView.as_view(), name="page-bundle"),
+    path("page/<int:pk>/bundle/", PageBundleView.as_view(), name="page-bundle-detail"),
     path("posters/", PostersView.as_view(), name="posters-list-create"),
     path("posters/<int:pk>/", PostersView.as_view(), name="posters-detail"),
     path("posters/<slug:slug>/", PostersView.as_view(), name="posters-detail-slug"),
@@ -156,10 +168,26 @@ urlpatterns = [
         SubcategoryView.as_view(),
         name="sub_category-detail",
     ),
+    path(
+        "modules/sub-category/tree/",
+        SubcategoryTreeView.as_view(),
+        name="sub_category-tree",
+    ),
+    path(
+        "modules/sub-category/<int:pk>/tree/",
+        SubcategoryTreeView.as_view(),
+        name="sub_category-subtree",
+    ),
+    path(
+        "modules/sub-category/<int:pk>/ancestors/",
+        SubcategoryAncestorsView.as_view(),
+        name="sub_category-ancestors",
+    ),
     path("modules/records/", RecordsView.as_view(), name="records-list-create"),
     path("modules/records/<int:pk>/", RecordsView.as_view(), name="records-detail"),
     path("banner/", BannerView.as_view(), name="banner-list-create"),
     path("banner/<int:pk>/", BannerView.as_view(), name="banner-detail"),
+    path("banner/reorder/", BannerReorderView.as_view(), name="banner-reorder"),
     path("container/", ContainerView.as_view(), name="container-list-create"),
     path("container/<int:pk>/", ContainerView.as_view(), name="container-detail"),
     path(
@@ -172,6 +200,11 @@ urlpatterns = [
         ServiceButtonsView.as_view(),
         name="service_buttons-detail",
     ),
+    path(
+        "service-buttons/reorder/",
+        ServiceButtonsReorderView.as_view(),
+        name="service_buttons-reorder",
+    ),
     path(
         "quick-access-buttons/",
         QuickAccessButtonsView.as_view(),
@@ -182,6 +215,11 @@ urlpatterns = [
         QuickAccessButtonsView.as_view(),
         name="quick_access_buttons-detail",
     ),
+    path(
+        "quick-access-buttons/reorder/",
+        QuickAccessButtonsReorderView.as_view(),
+        name="quick_access_buttons-reorder",
+    ),
     path("header/", HeaderView.as_view(), name="header-list-create"),
     path("header/<int:pk>/", HeaderView.as_view(), name="header-detail"),
 ]
@@ -3,6 +3,7 @@ from django.contrib.auth.models import User
 from django.core.exceptions import PermissionDenied, ValidationError
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.utils import timezone
 from rest_framework import generics, status
 from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
@@ -11,6 +12,10 @@ from rest_framework.views import APIView
 
 from accounts.models import Profile
 
+from .caching import bump_model_version, cache_response, cached_snapshot
+from .counters import get_counter_buffer
+from .fieldsets import get_fieldset
+from .loading import EagerLoadingMixin, plan_queryset
 from .models import (
     FAQ,
     AreaOfActivity,
@@ -19,8 +24,10 @@ from .models import (
     CardRegister,
     Cards,
     Category,
+    Contact,
     Container,
     Core,
+    Email,
     EmailWebsite,
     Header,
     News,
@@ -40,6 +47,13 @@ from .models import (
     UnitService,
     WebsiteInformations,
 )
+from .pagination import (
+    NewsFeedPagination,
+    OptionalPageNumberPagination,
+    PostersFeedPagination,
+)
+from .readers import CompiledReadMixin
+from .routes import get_route_table
 from .serializers import (
     AreaOfActivitySerializer,
     AreaOfDutySerializer,
@@ -63,16 +77,28 @@ from .serializers import (
     RecordsSerializer,
     ServiceButtonsSerializer,
     SocialMediaSerializer,
+    SubcategoryNodeSerializer,
     SubcategorySerializer,
     TagSerializer,
     TypeOfServiceSerializer,
     UnitSerializer,
     WebsiteInformationsSerializer,
 )
-from .services import clean_page_data, update_pages_path, update_path_on_page_deletion
+from .services import (
+    attach_published_records,
+    build_subcategory_tree,
+    clean_page_data,
+    filter_units,
+    get_cores_with_units,
+    reorder_positions,
+    update_pages_path,
+    update_path_on_page_deletion,
+    with_category_records,
+    with_unit_relations,
+)
 
 
-class FaqView(generics.GenericAPIView):
+class FaqView(EagerLoadingMixin, CompiledReadMixin, generics.GenericAPIView):
     queryset = FAQ.objects.all()
     serializer_class = FAQSerializer
 
@@ -88,6 +114,7 @@ class FaqView(generics.GenericAPIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @cache_response(FAQ, User, Profile)
     def get(self, request, *args, **kwargs):
         faqs = self.get_queryset()
 
@@ -96,8 +123,7 @@ class FaqView(generics.GenericAPIView):
             faqs = faqs.filter(status="published")
         faqs = faqs.order_by("-created_at")
 
-        serializer = self.get_serializer(faqs, many=True)
-        return Response(serializer.data)
+        return Response(self.get_list_data(faqs))
 
     def delete(self, request, pk, *args, **kwargs):
         try:
@@ -128,7 +154,7 @@ class FaqView(generics.GenericAPIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class CoreView(generics.GenericAPIView):
+class CoreView(EagerLoadingMixin, generics.GenericAPIView):
     queryset = Core.objects.all()
     serializer_class = CoreSerializer
 
@@ -137,6 +163,7 @@ class CoreView(generics.GenericAPIView):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    @cache_response(Core)
     def get(self, request, *args, **kwargs):
         core = self.get_queryset().order_by("-created_at")
         serializer = self.get_serializer(core, many=True)
@@ -178,7 +205,7 @@ class CoreView(generics.GenericAPIView):
         )
 
 
-class UnitView(generics.GenericAPIView):
+class UnitView(EagerLoadingMixin, generics.GenericAPIView):
     queryset = Unit.objects.all()
     serializer_class = UnitSerializer
 
@@ -187,23 +214,32 @@ class UnitView(generics.GenericAPIView):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    pagination_class = OptionalPageNumberPagination
+
+    @cache_response(Unit, UnitService, Contact, Email, AreaOfDuty)
     def get(self, request, *args, **kwargs):
-        unit = self.get_queryset().order_by("-created_at")
+        try:
+            unit = filter_units(self.get_queryset(), request.query_params)
+        except ValueError:
+            return Response(
+                {"error": "core deve ser um número"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        unit = self.get_serializer().prune_queryset(unit)
+        unit = unit.order_by("-created_at", "-id")
+
+        page = self.paginate_queryset(unit)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
         serializer = self.get_serializer(unit, many=True)
         return Response(serializer.data)
 
     def post(self, request, *args, **kwargs):
-        services_data = request.data.pop("services", [])
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             unit = serializer.save(author=request.user)
-
-            for service_item in services_data:
-                UnitService.objects.create(
-                    unit=unit,
-                    type_of_service_id=service_item["type_of_service"],
-                    schedules=service_item.get("schedules", ""),
-                )
             return Response(
                 self.get_serializer(unit).data, status=status.HTTP_201_CREATED
             )
@@ -217,19 +253,9 @@ class UnitView(generics.GenericAPIView):
                 {"Error": "Unit not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        services_data = request.data.pop("services", [])
         serializer = self.get_serializer(unit, data=request.data, partial=True)
         if serializer.is_valid():
             unit = serializer.save(author=request.user)
-
-            unit.services.all().delete()
-            for service_item in services_data:
-                UnitService.objects.create(
-                    unit=unit,
-                    type_of_service_id=service_item["type_of_service"],
-                    schedules=service_item.get("schedules", ""),
-                )
-
             return Response(self.get_serializer(unit).data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -249,6 +275,7 @@ class UnitView(generics.GenericAPIView):
 
 
 class CoreUnitsView(APIView):
+    @cache_response(Core, Unit, UnitService, Contact, Email, AreaOfDuty)
     def get(self, request, pk, *args, **kwargs):
         try:
             core = Core.objects.get(pk=pk)
@@ -257,12 +284,26 @@ class CoreUnitsView(APIView):
                 {"error": "Core not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        units = core.units.all()
+        try:
+            units = filter_units(core.units.all(), request.query_params)
+        except ValueError:
+            return Response(
+                {"error": "core deve ser um número"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        units = with_unit_relations(units).order_by("-created_at", "-id")
+
+        paginator = OptionalPageNumberPagination()
+        page = paginator.paginate_queryset(units, request, view=self)
+        if page is not None:
+            serializer = UnitSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+
         serializer = UnitSerializer(units, many=True)
         return Response(serializer.data)
 
 
-class AreaOfDutyView(generics.GenericAPIView):
+class AreaOfDutyView(EagerLoadingMixin, generics.GenericAPIView):
     queryset = AreaOfDuty.objects.all()
     serializer_class = AreaOfDutySerializer
 
@@ -278,6 +319,7 @@ class AreaOfDutyView(generics.GenericAPIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @cache_response(AreaOfDuty)
     def get(self, request, *args, **kwargs):
         duty = self.get_queryset().order_by("-created_at")
         serializer = self.get_serializer(duty, many=True)
@@ -312,7 +354,7 @@ class AreaOfDutyView(generics.GenericAPIView):
         )
 
 
-class TypeOfServiceView(generics.GenericAPIView):
+class TypeOfServiceView(EagerLoadingMixin, generics.GenericAPIView):
     queryset = TypeOfService.objects.all()
     serializer_class = TypeOfServiceSerializer
 
@@ -321,6 +363,7 @@ class TypeOfServiceView(generics.GenericAPIView):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    @cache_response(TypeOfService)
     def get(self, request, *args, **kwargs):
         type_of_service = self.get_queryset().order_by("-created_at")
         serializer = self.get_serializer(type_of_service, many=True)
@@ -364,7 +407,7 @@ class TypeOfServiceView(generics.GenericAPIView):
         )
 
 
-class PopupView(generics.GenericAPIView):
+class PopupView(EagerLoadingMixin, generics.GenericAPIView):
     queryset = Popup.objects.all()
     serializer_class = PopupSerializer
 
@@ -373,6 +416,7 @@ class PopupView(generics.GenericAPIView):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    @cache_response(Popup)
     def get(self, request, *args, **kwargs):
         popup = self.get_queryset()
         serializer = self.get_serializer(popup, many=True)
@@ -414,33 +458,33 @@ class PopupView(generics.GenericAPIView):
 
 class PopupIncrementClickView(generics.GenericAPIView):
     def post(self, request, pk):
-        try:
-            popup = Popup.objects.get(pk=pk)
-        except Popup.DoesNotExist:
+        clicks = Popup.objects.filter(pk=pk).values_list("click", flat=True).first()
+        if clicks is None:
             return Response(
                 {"error": "Popup not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        popup.increment_click()
-        return Response({"Clicks": popup.click}, status=status.HTTP_200_OK)
+        pending = get_counter_buffer().add(pk, "click")
+        return Response({"Clicks": clicks + pending}, status=status.HTTP_200_OK)
 
 
 class PopupIncrementVisualizationView(generics.GenericAPIView):
     def post(self, request, pk):
-        try:
-            popup = Popup.objects.get(pk=pk)
-        except Popup.DoesNotExist:
+        visualization = (
+            Popup.objects.filter(pk=pk).values_list("visualization", flat=True).first()
+        )
+        if visualization is None:
             return Response(
                 {"error": "Popup not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        popup.increment_visualization()
+        pending = get_counter_buffer().add(pk, "visualization")
         return Response(
-            {"Visualization": popup.visualization}, status=status.HTTP_200_OK
+            {"Visualization": visualization + pending}, status=status.HTTP_200_OK
         )
 
 
-class TagView(generics.GenericAPIView):
+class TagView(EagerLoadingMixin, generics.GenericAPIView):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
 
@@ -449,6 +493,7 @@ class TagView(generics.GenericAPIView):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    @cache_response(Tag)
     def get(self, request, *args, **kwargs):
         tag = self.get_queryset().order_by("-created_at")
         serializer = self.get_serializer(tag, many=True)
@@ -490,7 +535,7 @@ class TagView(generics.GenericAPIView):
         )
 
 
-class AreaOfActivityView(generics.GenericAPIView):
+class AreaOfActivityView(EagerLoadingMixin, generics.GenericAPIView):
     queryset = AreaOfActivity.objects.all()
     serializer_class = AreaOfActivitySerializer
 
@@ -499,6 +544,7 @@ class AreaOfActivityView(generics.GenericAPIView):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    @cache_response(AreaOfActivity)
     def get(self, request, *args, **kwargs):
         area_of_activity = self.get_queryset()
         serializer = self.get_serializer(area_of_activity, many=True)
@@ -553,6 +599,7 @@ class WebsiteInformationView(generics.GenericAPIView):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    @cache_response(WebsiteInformations)
     def get(self, request, *args, **kwargs):
         website_information = WebsiteInformations.objects.first()
         if not website_information:
@@ -607,7 +654,7 @@ class WebsiteInformationView(generics.GenericAPIView):
         )
 
 
-class SocialMediaView(generics.GenericAPIView):
+class SocialMediaView(EagerLoadingMixin, CompiledReadMixin, generics.GenericAPIView):
     serializer_class = SocialMediaSerializer
     queryset = SocialMedia.objects.all()
 
@@ -616,10 +663,10 @@ class SocialMediaView(generics.GenericAPIView):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    @cache_response(SocialMedia)
     def get(self, request, *args, **kwargs):
         social_media = self.get_queryset()
-        serializer = self.get_serializer(social_media, many=True)
-        return Response(serializer.data)
+        return Response(self.get_list_data(social_media))
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -657,7 +704,7 @@ class SocialMediaView(generics.GenericAPIView):
         )
 
 
-class EmailWebsiteView(generics.GenericAPIView):
+class EmailWebsiteView(EagerLoadingMixin, generics.GenericAPIView):
     queryset = EmailWebsite.objects.all()
     serializer_class = EmailWebsiteSerializer
 
@@ -666,6 +713,7 @@ class EmailWebsiteView(generics.GenericAPIView):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    @cache_response(EmailWebsite)
     def get(self, request, *args, **kwargs):
         email_website = self.get_queryset()
         serializer = self.get_serializer(email_website, many=True)
@@ -721,7 +769,7 @@ class AuthorsByModel(generics.GenericAPIView):
         return JsonResponse(data, safe=False)
 
 
-class NewsView(generics.GenericAPIView):
+class NewsView(EagerLoadingMixin, generics.GenericAPIView):
     serializer_class = NewsSerializer
     queryset = News.objects.all()
     lookup_field = "slug"
@@ -731,23 +779,31 @@ class NewsView(generics.GenericAPIView):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    @cache_response(News, Tag, NewsGalleryImage, NewsAttachment)
     def get(self, request, *args, **kwargs):
         slug = kwargs.get("slug")
+        news = self.get_queryset()
         if slug:
-            news = get_object_or_404(News, slug=slug)
+            news = get_object_or_404(
+                self.get_serializer().prune_queryset(news), slug=slug
+            )
             serializer = self.get_serializer(news)
             return Response(serializer.data)
 
-        news = self.get_queryset().order_by("-created_at")
         now = timezone.now()
-        News.objects.filter(status="scheduled", published_at__lte=now).update(
-            status="published"
-        )
 
         published_param = request.query_params.get("published")
         if published_param is not None and published_param.lower() == "true":
             news = news.filter(status="published", published_at__lte=now)
+            paginator = NewsFeedPagination()
+            news = self.get_serializer().prune_queryset(
+                news, keep=paginator.get_field_names()
+            )
+            page = paginator.paginate_queryset(news, request, view=self)
+            serializer = self.get_serializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
 
+        news = self.get_serializer().prune_queryset(news).order_by("-created_at")
         serializer = self.get_serializer(news, many=True)
         return Response(serializer.data)
 
@@ -785,7 +841,7 @@ class NewsView(generics.GenericAPIView):
         )
 
 
-class NewsGalleryImageView(generics.GenericAPIView):
+class NewsGalleryImageView(EagerLoadingMixin, generics.GenericAPIView):
     serializer_class = NewsGalleryImageSerializer
     queryset = NewsGalleryImage.objects.all()
 
@@ -794,6 +850,7 @@ class NewsGalleryImageView(generics.GenericAPIView):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    @cache_response(NewsGalleryImage)
     def get(self, request, pk=None, *args, **kwargs):
         if pk:
             try:
@@ -839,7 +896,7 @@ class NewsGalleryImageView(generics.GenericAPIView):
         )
 
 
-class NewsAttachmentView(generics.GenericAPIView):
+class NewsAttachmentView(EagerLoadingMixin, generics.GenericAPIView):
     serializer_class = NewsAttachmentSerializer
     queryset = NewsAttachment.objects.all()
 
@@ -848,6 +905,7 @@ class NewsAttachmentView(generics.GenericAPIView):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    @cache_response(NewsAttachment)
     def get(self, request, pk=None, *args, **kwargs):
         if pk:
             try:
@@ -895,7 +953,7 @@ class NewsAttachmentView(generics.GenericAPIView):
         )
 
 
-class CategoryView(generics.GenericAPIView):
+class CategoryView(EagerLoadingMixin, generics.GenericAPIView):
     serializer_class = CategorySerializer
     queryset = Category.objects.all()
 
@@ -904,9 +962,18 @@ class CategoryView(generics.GenericAPIView):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    @cache_response(Category, Subcategory, Records)
     def get(self, request, pk=None, *args, **kwargs):
+        fields = self.get_serializer().fields
         if pk:
-            category = get_object_or_404(Category, pk=pk)
+            category = get_object_or_404(
+                self.get_serializer().prune_queryset(
+                    with_category_records(self.get_queryset())
+                ),
+                pk=pk,
+            )
+            if "records" in fields:
+                attach_published_records([category])
             serializer = self.get_serializer(category)
             return Response(serializer.data)
 
@@ -926,7 +993,11 @@ class CategoryView(generics.GenericAPIView):
                     {"error": "IDs devem ser números separados por vírgula"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-        queryset = queryset.order_by("-created_at")
+        queryset = self.get_serializer().prune_queryset(
+            with_category_records(queryset.order_by("-created_at"))
+        )
+        if "records" in fields:
+            queryset = attach_published_records(queryset)
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
@@ -959,7 +1030,7 @@ class CategoryView(generics.GenericAPIView):
         )
 
 
-class SubcategoryView(generics.GenericAPIView):
+class SubcategoryView(EagerLoadingMixin, generics.GenericAPIView):
     serializer_class = SubcategorySerializer
     queryset = Subcategory.objects.all()
 
@@ -968,14 +1039,18 @@ class SubcategoryView(generics.GenericAPIView):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    @cache_response(Subcategory, Category, Records)
     def get(self, request, pk=None, *args, **kwargs):
         if pk:
 
-            sub_category = get_object_or_404(Subcategory, pk=pk)
+            sub_category = get_object_or_404(
+                self.get_serializer().prune_queryset(self.get_queryset()), pk=pk
+            )
             serializer = self.get_serializer(sub_category)
         else:
 
-            sub_category = self.get_queryset().order_by("-created_at")
+            sub_category = self.get_serializer().prune_queryset(self.get_queryset())
+            sub_category = sub_category.order_by("-created_at")
             serializer = self.get_serializer(sub_category, many=True)
         return Response(serializer.data)
 
@@ -1009,7 +1084,56 @@ class SubcategoryView(generics.GenericAPIView):
         )
 
 
-class RecordsView(generics.GenericAPIView):
+class SubcategoryTreeView(EagerLoadingMixin, generics.GenericAPIView):
+    serializer_class = SubcategoryNodeSerializer
+    queryset = Subcategory.objects.all()
+    permission_classes = [AllowAny]
+
+    @cache_response(Subcategory)
+    def get(self, request, pk=None, *args, **kwargs):
+        params = {}
+        for name in ["category", "max_depth"]:
+            value = request.query_params.get(name)
+            try:
+                params[name] = int(value) if value else None
+            except ValueError:
+                return Response(
+                    {"error": f"{name} deve ser um número"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        # max_depth counts the levels below the root: the subtree's root
+        # when one is given, the top-level subcategories otherwise.
+        queryset = self.get_queryset()
+        depth = 0
+        if pk:
+            root = get_object_or_404(Subcategory, pk=pk)
+            queryset = root.get_descendants(include_self=True)
+            depth = root.depth
+
+        if params["category"] is not None:
+            queryset = queryset.filter(category_id=params["category"])
+        if params["max_depth"] is not None:
+            queryset = queryset.filter(depth__lte=depth + params["max_depth"])
+
+        queryset = queryset.order_by("depth", "id")
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(build_subcategory_tree(serializer.data))
+
+
+class SubcategoryAncestorsView(generics.GenericAPIView):
+    serializer_class = SubcategoryNodeSerializer
+    queryset = Subcategory.objects.all()
+    permission_classes = [AllowAny]
+
+    @cache_response(Subcategory)
+    def get(self, request, pk, *args, **kwargs):
+        sub_category = get_object_or_404(Subcategory, pk=pk)
+        serializer = self.get_serializer(sub_category.get_ancestors(), many=True)
+        return Response(serializer.data)
+
+
+class RecordsView(EagerLoadingMixin, CompiledReadMixin, generics.GenericAPIView):
     serializer_class = RecordsSerializer
     queryset = Records.objects.all()
 
@@ -1018,10 +1142,10 @@ class RecordsView(generics.GenericAPIView):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    @cache_response(Records)
     def get(self, request, *args, **kwargs):
         records = self.get_queryset().order_by("-created_at")
-        serializer = self.get_serializer(records, many=True)
-        return Response(serializer.data)
+        return Response(self.get_list_data(records))
 
     def post(self, request, *args, **kwargs):
         records = self.get_serializer(data=request.data)
@@ -1051,7 +1175,7 @@ class RecordsView(generics.GenericAPIView):
         )
 
 
-class PostersView(generics.GenericAPIView):
+class PostersView(EagerLoadingMixin, CompiledReadMixin, generics.GenericAPIView):
     serializer_class = PostersSerializer
     queryset = Posters.objects.all()
     lookup_field = "slug"
@@ -1061,15 +1185,28 @@ class PostersView(generics.GenericAPIView):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    @cache_response(Posters)
     def get(self, request, *args, **kwargs):
         slug = kwargs.get("slug")
         if slug:
             poster = get_object_or_404(Posters, slug=slug)
             serializer = self.get_serializer(poster)
             return Response(serializer.data)
-        posters = self.get_queryset().order_by("-created_at")
-        serializer = self.get_serializer(posters, many=True)
-        return Response(serializer.data)
+        posters = self.get_queryset()
+
+        published_param = request.query_params.get("published")
+        if published_param is not None and published_param.lower() == "true":
+            posters = posters.filter(status="published")
+            paginator = PostersFeedPagination()
+            posters = self.get_serializer().prune_queryset(
+                posters, keep=paginator.get_field_names()
+            )
+            page = paginator.paginate_queryset(posters, request, view=self)
+            serializer = self.get_serializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+
+        posters = posters.order_by("-created_at")
+        return Response(self.get_list_data(posters))
 
     def post(self, request, *args, **kwargs):
         poster = self.get_serializer(data=request.data)
@@ -1099,7 +1236,7 @@ class PostersView(generics.GenericAPIView):
         )
 
 
-class CardsView(generics.GenericAPIView):
+class CardsView(EagerLoadingMixin, generics.GenericAPIView):
     serializer_class = CardsSerializer
     queryset = Cards.objects.all()
 
@@ -1108,17 +1245,18 @@ class CardsView(generics.GenericAPIView):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    @cache_response(Cards, CardRegister)
     def get(self, request, *args, **kwargs):
         pk = kwargs.get("pk")
+        cards = self.get_serializer().prune_queryset(self.get_queryset())
 
         if pk is not None:
             try:
-                card = self.get_queryset().prefetch_related("registers").get(pk=pk)
+                card = cards.get(pk=pk)
             except Cards.DoesNotExist:
                 return Response({"detail": "Card não encontrado."}, status=404)
             serializer = self.get_serializer(card)
         else:
-            cards = self.get_queryset()
             serializer = self.get_serializer(cards, many=True)
 
         return Response(serializer.data)
@@ -1156,7 +1294,7 @@ class CardsView(generics.GenericAPIView):
         )
 
 
-class CardRegisterView(generics.GenericAPIView):
+class CardRegisterView(EagerLoadingMixin, generics.GenericAPIView):
     serializer_class = CardRegisterSerializer
     queryset = CardRegister.objects.all()
     lookup_field = "slug"
@@ -1166,14 +1304,15 @@ class CardRegisterView(generics.GenericAPIView):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    @cache_response(CardRegister, Cards)
     def get(self, request, *args, **kwargs):
         slug = kwargs.get("slug")
+        card_register = self.get_serializer().prune_queryset(self.get_queryset())
         if slug:
-            card_register = get_object_or_404(CardRegister, slug=slug)
+            card_register = get_object_or_404(card_register, slug=slug)
             serializer = self.get_serializer(card_register)
             return Response(serializer.data)
 
-        card_register = self.get_queryset()
         serializer = self.get_serializer(card_register, many=True)
         return Response(serializer.data)
 
@@ -1211,18 +1350,18 @@ class CardRegisterView(generics.GenericAPIView):
         )
 
 
-class BannerView(generics.GenericAPIView):
+class BannerView(EagerLoadingMixin, CompiledReadMixin, generics.GenericAPIView):
     serializer_class = BannerSerializer
     queryset = Banner.objects.all()
 
+    @cache_response(Banner)
     def get(self, request, *args, **kwargs):
         banners = self.get_queryset()
         published_param = request.query_params.get("published")
         if published_param is not None and published_param.lower() == "true":
             banners = banners.filter(status="published")
 
-        serializer = self.get_serializer(banners, many=True)
-        return Response(serializer.data)
+        return Response(self.get_list_data(banners))
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -1251,10 +1390,11 @@ class BannerView(generics.GenericAPIView):
         )
 
 
-class ContainerView(generics.GenericAPIView):
+class ContainerView(EagerLoadingMixin, generics.GenericAPIView):
     serializer_class = ContainerSerializer
     queryset = Container.objects.all()
 
+    @cache_response(Container, Page)
     def get(self, request, *args, **kwargs):
         containers = self.get_queryset()
         serializer = self.get_serializer(containers, many=True)
@@ -1288,14 +1428,14 @@ class ContainerView(generics.GenericAPIView):
         )
 
 
-class ServiceButtonsView(generics.GenericAPIView):
+class ServiceButtonsView(EagerLoadingMixin, CompiledReadMixin, generics.GenericAPIView):
     serializer_class = ServiceButtonsSerializer
     queryset = ServiceButtons.objects.all()
 
+    @cache_response(ServiceButtons)
     def get(self, request, *args, **kwargs):
         services_buttons = self.get_queryset()
-        serializer = self.get_serializer(services_buttons, many=True)
-        return Response(serializer.data)
+        return Response(self.get_list_data(services_buttons))
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -1330,14 +1470,14 @@ class ServiceButtonsView(generics.GenericAPIView):
         )
 
 
-class QuickAccessButtonsView(generics.GenericAPIView):
+class QuickAccessButtonsView(EagerLoadingMixin, CompiledReadMixin, generics.GenericAPIView):
     serializer_class = QuickAccessButtonsSerializer
     queryset = QuickAccessButtons.objects.all()
 
+    @cache_response(QuickAccessButtons)
     def get(self, request, *args, **kwargs):
         quick_access_buttons = self.get_queryset()
-        serializer = self.get_serializer(quick_access_buttons, many=True)
-        return Response(serializer.data)
+        return Response(self.get_list_data(quick_access_buttons))
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -1372,7 +1512,7 @@ class QuickAccessButtonsView(generics.GenericAPIView):
         )
 
 
-class PageView(generics.GenericAPIView):
+class PageView(EagerLoadingMixin, generics.GenericAPIView):
     queryset = Page.objects.all()
     serializer_class = PageSerializer
 
@@ -1382,30 +1522,38 @@ class PageView(generics.GenericAPIView):
         return [IsAuthenticated()]
 
     def get_queryset(self):
+        queryset = super().get_queryset()
         user = self.request.user
 
         if not user.is_authenticated:
-            return Page.objects.all()
+            return queryset
 
         if user.is_superuser:
-            return Page.objects.all()
+            return queryset
 
-        return Page.objects.filter(allowed_users__user=user).distinct()
+        return queryset.filter(allowed_users__user=user).distinct()
 
+    @cache_response(Page, Profile)
     def get(self, request, pk=None, *args, **kwargs):
         path = request.query_params.get("path")
 
+        pages = self.eager_load(Page.objects.all())
         if pk:
-            page = get_object_or_404(Page, pk=pk)
+            page = get_object_or_404(pages, pk=pk)
             serializer = self.get_serializer(page)
             return Response(serializer.data)
 
         if path:
-            page = get_object_or_404(Page, path=path)
+            route = get_route_table().resolve(path)
+            if route and route.page_id:
+                page = get_object_or_404(pages, pk=route.page_id)
+            else:
+                page = get_object_or_404(pages, path=path)
             serializer = self.get_serializer(page)
             return Response(serializer.data)
 
-        pages = self.get_queryset().order_by("-created_at")
+        pages = self.get_serializer().prune_queryset(self.get_queryset())
+        pages = pages.order_by("-created_at")
         serializer = self.get_serializer(pages, many=True)
         return Response(serializer.data)
 
@@ -1449,7 +1597,151 @@ class PageView(generics.GenericAPIView):
         )
 
 
-class CoresAndUnitView(generics.GenericAPIView):
+class PageRouteView(APIView):
+    permission_classes = [AllowAny]
+
+    @cache_response(Header, Page)
+    def get(self, request, *args, **kwargs):
+        path = request.query_params.get("path")
+        if not path:
+            return Response(
+                {"error": "path is required"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        route = get_route_table().resolve(path)
+        if route is None:
+            return Response(
+                {"error": "Route not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(
+            {
+                "path": route.path,
+                "page": route.page_id,
+                "ancestors": [
+                    {"path": ancestor.path, "page": ancestor.page_id}
+                    for ancestor in route.ancestors
+                ],
+            }
+        )
+
+
+class PageBundleView(APIView):
+    """
+    A page together with the content its flags ask for, so a content page
+    renders from a single request. Long lists only carry their first page
+    and a ``next`` link into the matching feed endpoint.
+    """
+
+    permission_classes = [AllowAny]
+
+    flag_models = {
+        "has_faq": [FAQ, User],
+        "has_news": [News, Tag, NewsGalleryImage, NewsAttachment],
+        "has_posters": [Posters],
+        "has_cores": [Core, Unit, UnitService, Contact, Email, AreaOfDuty],
+        "card": [Cards, CardRegister],
+        "category": [Category, Subcategory, Records],
+    }
+    # Every model a bundle may read, as its flags are only known once the
+    # page is loaded.
+    bundle_models = [
+        Page,
+        Header,
+        Profile,
+        *{model: None for models in flag_models.values() for model in models},
+    ]
+
+    def get_feed(self, paginator, queryset, serializer_class, url_name):
+        base_url = self.request.build_absolute_uri(
+            f"{reverse(url_name)}?published=true"
+        )
+        page = paginator.paginate_first_page(queryset, base_url)
+        return paginator.get_paginated_response(
+            serializer_class(page, many=True, context={"request": self.request}).data
+        ).data
+
+    def get_page_id(self, request, pk):
+        """The page asked for by id, in the url or ``?id=``, or by ``?path=``."""
+        page_id = pk or request.query_params.get("id")
+        path = request.query_params.get("path")
+        if page_id is not None or not path:
+            return page_id
+
+        route = get_route_table().resolve(path)
+        if route and route.page_id:
+            return route.page_id
+        return get_object_or_404(Page.objects.only("id"), path=path).pk
+
+    def build(self, page_id):
+        context = {"request": self.request}
+        page = get_object_or_404(
+            Page.objects.prefetch_related("allowed_users"), pk=page_id
+        )
+        data = {"page": PageSerializer(page, context=context).data}
+
+        if page.has_faq:
+            data["faq"] = FAQSerializer(
+                FAQ.objects.filter(status="published")
+                .select_related("author")
+                .order_by("created_at", "id"),
+                many=True,
+                context=context,
+            ).data
+        if page.has_news:
+            data["news"] = self.get_feed(
+                NewsFeedPagination(),
+                News.objects.filter(
+                    status="published", published_at__lte=timezone.now()
+                ).prefetch_related("tags", "gallery", "attachments"),
+                NewsSerializer,
+                "news-list-create",
+            )
+        if page.has_posters:
+            data["posters"] = self.get_feed(
+                PostersFeedPagination(),
+                Posters.objects.filter(status="published"),
+                PostersSerializer,
+                "posters-list-create",
+            )
+        if page.has_cores:
+            cores = plan_queryset(
+                CoresAndUnitSerializer(), get_cores_with_units()
+            ).filter(status="published")
+            data["cores"] = CoresAndUnitSerializer(
+                cores.order_by("-created_at"), many=True, context=context
+            ).data
+        if page.card_id:
+            card = Cards.objects.prefetch_related("registers").get(pk=page.card_id)
+            data["card"] = CardsSerializer(card, context=context).data
+        if page.category_id:
+            category = plan_queryset(
+                CategorySerializer(), with_category_records(Category.objects.all())
+            ).get(pk=page.category_id)
+            attach_published_records([category])
+            data["category"] = CategorySerializer(category, context=context).data
+        return data
+
+    @cache_response(*bundle_models)
+    def get(self, request, pk=None, *args, **kwargs):
+        page_id = self.get_page_id(request, pk)
+        if page_id is None:
+            return Response(
+                {"error": "path or id is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            page_id = int(page_id)
+        except ValueError:
+            return Response(
+                {"error": "id deve ser um número"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(self.build(page_id))
+
+
+class CoresAndUnitView(EagerLoadingMixin, generics.GenericAPIView):
     queryset = Core.objects.all()
     serializer_class = CoresAndUnitSerializer
 
@@ -1458,19 +1750,30 @@ class CoresAndUnitView(generics.GenericAPIView):
             return [AllowAny()]
         return [IsAuthenticated()]
 
+    snapshot_models = [Core, Unit, UnitService, Contact, Email, AreaOfDuty]
+
+    @cache_response(*snapshot_models)
     def get(self, request, *args, **kwargs):
-        cores_and_unit = self.get_queryset().order_by("-created_at")
-        cores_with_units = cores_and_unit.filter(units__isnull=False).distinct()
         published_param = request.query_params.get("published")
+        published_only = bool(published_param and published_param.lower() == "true")
 
-        if published_param and published_param.lower() == "true":
-            cores_with_units = cores_with_units.filter(status="published")
-
-        serializer = self.get_serializer(cores_with_units, many=True)
-        return Response(serializer.data)
+        def build():
+            cores_with_units = self.get_serializer().prune_queryset(
+                self.eager_load(get_cores_with_units())
+            )
+            cores_with_units = cores_with_units.order_by("-created_at")
+            if published_only:
+                cores_with_units = cores_with_units.filter(status="published")
+            return self.get_serializer(cores_with_units, many=True).data
+
+        fieldset = get_fieldset(request)
+        data = cached_snapshot(
+            f"cores-units:{published_only}:{fieldset}", self.snapshot_models, build
+        )
+        return Response(data)
 
 
-class HeaderView(generics.GenericAPIView):
+class HeaderView(EagerLoadingMixin, generics.GenericAPIView):
     serializer_class = HeaderSerializer
     queryset = Header.objects.all()
 
@@ -1479,6 +1782,7 @@ class HeaderView(generics.GenericAPIView):
             return [AllowAny()]
         return [IsAuthenticated()]
 
+    @cache_response(Header)
     def get(self, request, *args, **kwargs):
         header = self.get_queryset()
         serializer = self.get_serializer(header, many=True)
@@ -1505,6 +1809,7 @@ class HeaderView(generics.GenericAPIView):
             updated_structure = update_pages_path(structure)
         else:
             Page.objects.all().update(status="not_published", path=None)
+            bump_model_version(Page)
             updated_structure = None
 
         if hasattr(incoming, "copy"):
@@ -1535,3 +1840,143 @@ class HeaderView(generics.GenericAPIView):
         return Response(
             f"Header {pk} was deleted successfully", status=status.HTTP_204_NO_CONTENT
         )
+
+
+class HomeView(APIView):
+    """
+    Everything the homepage renders, in one response. Each key holds the
+    same payload as the standalone endpoint it replaces, restricted to
+    published items.
+    """
+
+    permission_classes = [AllowAny]
+
+    snapshot_models = [
+        Banner,
+        ServiceButtons,
+        QuickAccessButtons,
+        Container,
+        Page,
+        Popup,
+        SocialMedia,
+        WebsiteInformations,
+        Header,
+        News,
+        Tag,
+        NewsGalleryImage,
+        NewsAttachment,
+    ]
+
+    @cache_response(*snapshot_models)
+    def get(self, request, *args, **kwargs):
+        context = {"request": request}
+
+        def build():
+            website_information = WebsiteInformations.objects.first()
+            news = (
+                News.objects.filter(
+                    status="published", published_at__lte=timezone.now()
+                )
+                .exclude(highlight="normal")
+                .prefetch_related("tags", "gallery", "attachments")
+                .order_by("highlight", "-published_at", "-id")
+            )
+            return {
+                "banners": BannerSerializer(
+                    Banner.objects.filter(status="published").order_by(
+                        "group", "position"
+                    ),
+                    many=True,
+                    context=context,
+                ).data,
+                "service_buttons": ServiceButtonsSerializer(
+                    ServiceButtons.objects.filter(status="published").order_by(
+                        "position"
+                    ),
+                    many=True,
+                    context=context,
+                ).data,
+                "quick_access_buttons": QuickAccessButtonsSerializer(
+                    QuickAccessButtons.objects.filter(status="published").order_by(
+                        "group", "position"
+                    ),
+                    many=True,
+                    context=context,
+                ).data,
+                "containers": ContainerSerializer(
+                    Container.objects.filter(status="published")
+                    .select_related("internal_link")
+                    .order_by("id"),
+                    many=True,
+                    context=context,
+                ).data,
+                "popups": PopupSerializer(
+                    Popup.objects.filter(status="published").order_by(
+                        "-published_at", "-id"
+                    ),
+                    many=True,
+                    context=context,
+                ).data,
+                "social_media": SocialMediaSerializer(
+                    SocialMedia.objects.filter(status="published").order_by("id"),
+                    many=True,
+                    context=context,
+                ).data,
+                "website_information": WebsiteInformationsSerializer(
+                    website_information, context=context
+                ).data
+                if website_information
+                else None,
+                "header": HeaderSerializer(
+                    Header.objects.order_by("id"), many=True, context=context
+                ).data,
+                "news": NewsSerializer(news, many=True, context=context).data,
+            }
+
+        # Media URLs are absolute, so each host gets its own snapshot.
+        data = cached_snapshot(
+            f"home:{request.build_absolute_uri('/')}", self.snapshot_models, build
+        )
+        return Response(data)
+
+
+class PositionReorderView(generics.GenericAPIView):
+    """
+    Drag-and-drop reordering: ``{"ids": [...], "group": ...}`` lists every
+    row of the group in its new order, applied in one transaction.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def patch(self, request, *args, **kwargs):
+        ids = request.data.get("ids")
+        if not isinstance(ids, list) or not all(isinstance(pk, int) for pk in ids):
+            return Response(
+                {"error": "ids deve ser uma lista de números"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        model = self.get_queryset().model
+        try:
+            reorder_positions(model, ids, request.data.get("group"))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = self.get_queryset().filter(pk__in=ids).order_by("position")
+        serializer = self.get_serializer(rows, many=True)
+        return Response(serializer.data)
+
+
+class BannerReorderView(PositionReorderView):
+    queryset = Banner.objects.all()
+    serializer_class = BannerSerializer
+
+
+class ServiceButtonsReorderView(PositionReorderView):
+    queryset = ServiceButtons.objects.all()
+    serializer_class = ServiceButtonsSerializer
+
+
+class QuickAccessButtonsReorderView(PositionReorderView):
+    queryset = QuickAccessButtons.objects.all()
+    serializer_class = QuickAccessButtonsSerializer
@@ -1,11 +1,13 @@
 import os
 from datetime import timedelta
+from importlib.util import find_spec
 from pathlib import Path
 
 import boto3
 import corsheaders
 import dotenv
 from celery.schedules import crontab
+from django.core.exceptions import ImproperlyConfigured
 
 dotenv.load_dotenv()
 
@@ -31,8 +33,24 @@ REST_FRAMEWORK = {
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "core.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
 
+# MessagePack is offered to clients that ask for it when msgpack is installed.
+if find_spec("msgpack"):
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"].insert(
+        1, "core.renderers.MessagePackRenderer"
+    )
+    REST_FRAMEWORK["DEFAULT_PARSER_CLASSES"].insert(1, "core.parsers.MessagePackParser")
+
 
 INSTALLED_APPS = [
     "django.contrib.admin",
@@ -52,6 +70,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.QueryInstrumentationMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -64,6 +83,12 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "dpe_core.urls"
 
+# Share of requests profiled by core.middleware.QueryInstrumentationMiddleware,
+# from 0 (off) to 1 (every request).
+QUERY_INSTRUMENTATION_SAMPLE_RATE = float(
+    os.environ.get("QUERY_INSTRUMENTATION_SAMPLE_RATE", "0")
+)
+
 CORS_ALLOW_ALL_ORIGINS = True
 
 TEMPLATES = [
@@ -146,9 +171,51 @@ CELERY_BROKER_URL = "redis://redis:6379/0"
 
 CELERY_RESULT_BACKEND = "redis://redis:6379/0"
 
+COUNTER_BUFFER_URL = os.environ.get("COUNTER_BUFFER_URL", "redis://redis:6379/2")
+
+SNAPSHOT_ROOT = os.environ.get("SNAPSHOT_ROOT", "snapshots")
+
+SNAPSHOT_BASE_URL = os.environ.get("SNAPSHOT_BASE_URL", "http://localhost")
+
+# Model versions, cached responses and the route table are shared through
+# this cache, so the web and Celery processes must all point at the same
+# Redis. A per-process cache is only allowed while debugging.
+CACHE_URL = os.environ.get("CACHE_URL", "redis://redis:6379/1")
+
+if CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        }
+    }
+elif DEBUG:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+else:
+    raise ImproperlyConfigured("CACHE_URL must be set when DEBUG is off.")
+
+if not COUNTER_BUFFER_URL and not DEBUG:
+    raise ImproperlyConfigured("COUNTER_BUFFER_URL must be set when DEBUG is off.")
+
 CELERY_BEAT_SCHEDULE = {
     "publish_posts": {
         "task": "dpe_core.tasks.publish_news",
         "schedule": crontab(minute="*/1"),
     },
+    "flush_popup_counters": {
+        "task": "dpe_core.tasks.flush_popup_counters",
+        "schedule": crontab(minute="*/1"),
+    },
+    "reconcile_tag_counters": {
+        "task": "dpe_core.tasks.reconcile_tag_counters",
+        "schedule": crontab(minute=0),
+    },
+    "publish_snapshots": {
+        "task": "dpe_core.tasks.publish_snapshots",
+        "schedule": crontab(minute="*/5"),
+    },
 }
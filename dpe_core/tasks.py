@@ -1,6 +1,51 @@
 from celery import shared_task
+from django.apps import apps
+
+from core import counters, snapshots
+from core.services import (
+    expire_popups,
+    publish_due_items,
+    publish_scheduled_item,
+    reconcile_tag_usage,
+)
 
 
 @shared_task
 def publish_news():
-    return True
+    """
+    Sweeper run by celery beat. Publishes every scheduled row that is due and
+    expires finished popups, covering any task that was lost or never queued.
+    """
+    published = publish_due_items()
+    expired = expire_popups()
+    return {"published": published, "expired": expired}
+
+
+@shared_task
+def publish_scheduled(model_label, pk):
+    model = apps.get_model(model_label)
+    return publish_scheduled_item(model, pk)
+
+
+@shared_task
+def expire_popup(pk):
+    return expire_popups(pk=pk)
+
+
+@shared_task
+def reconcile_tag_counters():
+    """
+    Fixes Tag.times_used for tags whose counter drifted, e.g. after news were
+    deleted, since cascaded deletes bypass the m2m_changed signal.
+    """
+    return reconcile_tag_usage()
+
+
+@shared_task
+def flush_popup_counters():
+    return counters.flush_popup_counters()
+
+
+@shared_task
+def publish_snapshots(force=False):
+    return snapshots.publish_snapshots(force=force)